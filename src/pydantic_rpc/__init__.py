@@ -5,6 +5,19 @@ from .core import (
     ASGIApp,
     ConnecpyASGIApp,
     Message,
+    ValidationPolicy,
+    AdaptiveLimiter,
+    limit_concurrency,
+    ServerOptions,
+    compress_response,
+    LoadAwareHealth,
+    batch_requests,
+    coalesce_responses,
+    prefetch_responses,
+    request_validation,
+    lazy_request,
+    run_inline,
+    run_in_process,
 )
 
 __all__ = [
@@ -14,4 +27,17 @@ __all__ = [
     "ASGIApp",
     "ConnecpyASGIApp",
     "Message",
+    "ValidationPolicy",
+    "AdaptiveLimiter",
+    "limit_concurrency",
+    "ServerOptions",
+    "compress_response",
+    "LoadAwareHealth",
+    "batch_requests",
+    "coalesce_responses",
+    "prefetch_responses",
+    "request_validation",
+    "lazy_request",
+    "run_inline",
+    "run_in_process",
 ]
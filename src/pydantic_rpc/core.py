@@ -1,32 +1,54 @@
 import annotated_types
 import asyncio
+import collections
+import contextlib
+import contextvars
 import enum
+import hashlib
+import importlib.metadata
+import importlib.resources
 import importlib.util
 import inspect
+import itertools
+import multiprocessing
 import os
+import queue
+import select
+import shutil
 import signal
+import struct
 import sys
+import tempfile
+import threading
 import time
+import traceback
 import types
+import weakref
 import datetime
+import gzip
+import zlib
+from abc import ABC, abstractmethod
 from concurrent import futures
 from posixpath import basename
 from typing import (
+    Annotated,
     Callable,
+    ClassVar,
+    Literal,
     Type,
     get_args,
     get_origin,
     Union,
     TypeAlias,
 )
-from collections.abc import AsyncIterator
+from collections.abc import AsyncIterator, Generator, Iterator
 
 import grpc
 from grpc_health.v1 import health_pb2, health_pb2_grpc
 from grpc_health.v1.health import HealthServicer
 from grpc_reflection.v1alpha import reflection
 from grpc_tools import protoc
-from pydantic import BaseModel, ValidationError
+from pydantic import BaseModel, ConfigDict, TypeAdapter, ValidationError
 from sonora.wsgi import grpcWSGI
 from sonora.asgi import grpcASGI
 from connecpy.asgi import ConnecpyASGIApp as ConnecpyASGI
@@ -35,6 +57,19 @@ from connecpy.wsgi import ConnecpyWSGIApp as ConnecpyWSGI
 
 # Protobuf Python modules for Timestamp, Duration (requires protobuf / grpcio)
 from google.protobuf import timestamp_pb2, duration_pb2
+from google.protobuf import descriptor_pb2, descriptor_pool, message_factory
+from google.protobuf.internal import enum_type_wrapper
+from google.protobuf.message import DecodeError
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
 ###############################################################################
 # 1. Message definitions & converter extensions
@@ -75,85 +110,232 @@ def python_to_duration(td: datetime.timedelta) -> duration_pb2.Duration:  # type
     return d
 
 
-def generate_converter(annotation: Type) -> Callable:
+class FunctionCompiler(ABC):
     """
-    Returns a converter function to convert protobuf types to Python types.
-    This is used primarily when handling incoming requests.
+    Base class for compilers that emit Python source for per-Message functions.
+
+    Subclasses implement `_function_source`; every Message type reached through
+    `_function_for` gets one function, and all of them share one namespace.
     """
-    # For primitive types
-    if annotation in (int, str, bool, bytes, float):
-        return primitiveProtoValueToPythonValue
 
-    # For enum types
-    if inspect.isclass(annotation) and issubclass(annotation, enum.Enum):
+    kind = "function"
+
+    def __init__(self) -> None:
+        self._namespace: dict[str, object] = {}
+        self._functions: dict[type, str] = {}
+        self._pending: list[type] = []
+        self._helpers: list[str] = []
+        self._counter = 0
+
+    def compile(self, message_type: Type[Message]) -> Callable:
+        root = self._function_for(message_type)
+        self._exec([], message_type)
+        return self._namespace[root]  # type: ignore
+
+    def _exec(self, sources: list[str], message_type: type) -> None:
+        """Generate the pending functions and execute them with `sources`."""
+        while self._pending:
+            mt = self._pending.pop()
+            sources.append(self._function_source(mt, self._functions[mt]))
+        sources.extend(self._helpers)
+        code = compile(
+            "\n".join(sources),
+            f"<pydantic_rpc {self.kind} for {message_type.__qualname__}>",
+            "exec",
+        )
+        exec(code, self._namespace)
 
-        def enum_converter(value):
-            return annotation(value)
+    @abstractmethod
+    def _function_source(self, message_type: type, name: str) -> str:
+        """Return the source of function `name` for `message_type`."""
 
-        return enum_converter
+    def _name(self, prefix: str) -> str:
+        self._counter += 1
+        return f"_{prefix}{self._counter}"
 
-    # For datetime
-    if annotation == datetime.datetime:
+    def _constant(self, prefix: str, value: object) -> str:
+        name = self._name(prefix)
+        self._namespace[name] = value
+        return name
 
-        def ts_converter(value: timestamp_pb2.Timestamp):  # type: ignore
-            return value.ToDatetime()
+    def _function_for(self, message_type: type) -> str:
+        name = self._functions.get(message_type)
+        if name is None:
+            name = self._functions[message_type] = self._name(self.kind + "_")
+            self._pending.append(message_type)
+        return name
 
-        return ts_converter
 
-    # For timedelta
-    if annotation == datetime.timedelta:
+class MessageConverterCompiler(FunctionCompiler):
+    """
+    Compile a protobuf -> Python Message converter into a single function.
 
-        def dur_converter(value: duration_pb2.Duration):  # type: ignore
-            return value.ToTimedelta()
+    Each field becomes an inline expression: primitives are read as-is, enums
+    go through a precomputed value -> member table and nested Message types
+    are constructed in place. Only self-referencing Message types get a
+    function of their own, so recursive schemas still terminate.
 
-        return dur_converter
+    With `trusted=True` every Message is built with `model_construct`, skipping
+    Pydantic validation.
+    """
 
-    origin = get_origin(annotation)
-    if origin is not None:
-        # For seq types
-        if origin in (list, tuple):
-            item_converter = generate_converter(get_args(annotation)[0])
+    kind = "converter"
+
+    def __init__(self, trusted: bool = False) -> None:
+        super().__init__()
+        self._trusted = trusted
+
+    def _function_source(self, message_type: type, name: str) -> str:
+        expr = self._message_expr(message_type, "request", (message_type,))
+        return f"def {name}(request):\n    return {expr}\n"
+
+    def compile_fields(self, message_type: Type[Message]) -> dict[str, Callable]:
+        """Compile one converter per field, each taking the whole protobuf message."""
+        names = {}
+        sources = []
+        for field_name, field_info in message_type.model_fields.items():
+            name = names[field_name] = self._name("field_")
+            expr = self._field_expr(
+                field_name,
+                field_info.annotation,
+                "request",
+                (message_type,),  # type: ignore
+            )
+            sources.append(f"def {name}(request):\n    return {expr}\n")
+        self._exec(sources, message_type)
+        return {field: self._namespace[name] for field, name in names.items()}  # type: ignore
+
+    def _message_expr(self, message_type: type, src: str, stack: tuple) -> str:
+        # Protobuf attribute reads are cheap and side-effect free, so `src` is
+        # simply re-read per field instead of being bound to a temporary.
+        if self._trusted:
+            cls = self._constant("construct", message_type.model_construct)  # type: ignore
+        else:
+            cls = self._constant("Message", message_type)
+        args = []
+        for field_name, field_info in message_type.model_fields.items():  # type: ignore
+            expr = self._field_expr(field_name, field_info.annotation, src, stack)  # type: ignore
+            args.append(f"{field_name}={expr}")
+        return f"{cls}({', '.join(args)})"
+
+    def _field_expr(
+        self, field_name: str, annotation: Type, src: str, stack: tuple
+    ) -> str:
+        """Return an expression reading and converting one field of message `src`."""
+        if is_union_type(annotation):
+            return f"{self._oneof_decoder(field_name, annotation, stack)}({src})"
+        field_src = f"{src}.{field_name}"
+        return self._value_expr(annotation, field_src, stack) or field_src
+
+    def _oneof_decoder(self, field_name: str, annotation: Type, stack: tuple) -> str:
+        """
+        Generate a function decoding a union field from its protobuf oneof.
+        `WhichOneof` names the set member, which indexes a table of converters.
+        """
+        table = {}
+        for member_type in flatten_union(annotation):
+            expr = self._value_expr(member_type, "value", stack)
+            if expr is None:
+                table[oneof_member_name(field_name, member_type)] = None
+                continue
+            member = self._name("member_")
+            self._helpers.append(f"def {member}(value):\n    return {expr}\n")
+            table[oneof_member_name(field_name, member_type)] = member
+        name = self._name("oneof_")
+        table_src = ", ".join(f"{k!r}: {v}" for k, v in table.items())
+        self._helpers.append(
+            f"{name}_table = {{{table_src}}}\n"
+            f"def {name}(msg):\n"
+            f"    which = msg.WhichOneof({field_name!r})\n"
+            f"    if which is None:\n"
+            f"        return None\n"
+            f"    convert = {name}_table[which]\n"
+            f"    value = getattr(msg, which)\n"
+            f"    return value if convert is None else convert(value)\n"
+        )
+        return name
+
+    def _value_expr(self, annotation: Type, src: str, stack: tuple) -> str | None:
+        """Return an expression converting `src`, or None if no conversion is needed."""
+        if annotation in (int, str, bool, bytes, float):
+            return None
+
+        if is_enum_type(annotation):
+            table = self._constant("enum", {m.value: m for m in annotation})
+            # Unknown values are passed through for Pydantic to reject.
+            return f"{table}.get({src}, {src})"
 
-            def seq_converter(value):
-                return [item_converter(v) for v in value]
+        if annotation == datetime.datetime:
+            return f"{src}.ToDatetime()"
 
-            return seq_converter
+        if annotation == datetime.timedelta:
+            return f"{src}.ToTimedelta()"
+
+        origin = get_origin(annotation)
+        if origin in (list, tuple):
+            var = self._name("v")
+            item_expr = self._value_expr(get_args(annotation)[0], var, stack)
+            if item_expr is None:
+                return f"list({src})"
+            return f"[{item_expr} for {var} in {src}]"
 
-        # For dict types
         if origin is dict:
-            key_converter = generate_converter(get_args(annotation)[0])
-            value_converter = generate_converter(get_args(annotation)[1])
+            key_type, value_type = get_args(annotation)
+            k, v = self._name("k"), self._name("v")
+            key_expr = self._value_expr(key_type, k, stack)
+            value_expr = self._value_expr(value_type, v, stack)
+            if key_expr is None and value_expr is None:
+                return f"dict({src})"
+            return (
+                f"{{{key_expr or k}: {value_expr or v} for {k}, {v} in {src}.items()}}"
+            )
 
-            def dict_converter(value):
-                return {key_converter(k): value_converter(v) for k, v in value.items()}
+        if inspect.isclass(annotation) and issubclass(annotation, Message):
+            if annotation in stack:
+                return f"{self._function_for(annotation)}({src})"
+            return self._message_expr(annotation, src, stack + (annotation,))
 
-            return dict_converter
+        # For union types or other unsupported cases, just return the value as-is.
+        return None
 
-    # For Message classes
-    if inspect.isclass(annotation) and issubclass(annotation, Message):
-        return generate_message_converter(annotation)
 
-    # For union types or other unsupported cases, just return the value as-is.
-    return primitiveProtoValueToPythonValue
+def compile_message_converter(
+    arg_type: Type[Message], trusted: bool = False
+) -> Callable:
+    """Compile a specialized protobuf -> Python Message converter function."""
+    return MessageConverterCompiler(trusted).compile(arg_type)
 
 
-def generate_message_converter(arg_type: Type[Message]) -> Callable:
-    """Return a converter function for protobuf -> Python Message."""
-    if arg_type is None or not issubclass(arg_type, Message):
-        raise TypeError("Request arg must be subclass of Message")
+def get_message_descriptor(message_type: Type, pb2_module) -> object | None:
+    """Return the protobuf descriptor generated for a Message class, if known."""
+    if pb2_module is None:
+        return None
+    proto_class = getattr(pb2_module, message_type.__name__, None)
+    return getattr(proto_class, "DESCRIPTOR", None)
 
-    fields = arg_type.model_fields
-    converters = {
-        field: generate_converter(field_type.annotation)  # type: ignore
-        for field, field_type in fields.items()
-    }
 
-    def converter(request):
-        rdict = {}
-        for field in fields.keys():
-            rdict[field] = converters[field](getattr(request, field))
-        return arg_type(**rdict)
+# Compiled converters shared by every server and app, keyed by
+# (Message class, protobuf descriptor, trusted).
+_message_converters: dict[tuple[type, object, bool], Callable] = {}
 
+
+def generate_message_converter(
+    arg_type: Type[Message], pb2_module=None, trusted: bool = False
+) -> Callable:
+    """
+    Return a converter function for protobuf -> Python Message.
+    The converter is compiled once per (Message class, pb2 descriptor) and reused.
+    Trusted converters build Messages with `model_construct`, skipping validation.
+    """
+    if arg_type is None or not issubclass(arg_type, Message):
+        raise TypeError("Request arg must be subclass of Message")
+
+    key = (arg_type, get_message_descriptor(arg_type, pb2_module), trusted)
+    converter = _message_converters.get(key)
+    if converter is None:
+        converter = _message_converters.setdefault(
+            key, compile_message_converter(arg_type, trusted)
+        )
     return converter
 
 
@@ -175,13 +357,636 @@ def python_value_to_proto_value(field_type: Type, value):
 
 
 ###############################################################################
-# 2. Stub implementation
+# 2. Per-method options & request validation
 ###############################################################################
 
 
-def connect_obj_with_stub(pb2_grpc_module, pb2_module, service_obj: object) -> type:
+def set_method_option(func: Callable, name: str, value) -> Callable:
+    """Attach a pydantic-rpc option to an RPC method (used by decorators)."""
+    options = func.__dict__.setdefault("__pydantic_rpc_options__", {})
+    options[name] = value
+    return func
+
+
+def get_method_option(method: Callable, name: str, default=None):
+    """Return an option attached to an RPC method, or `default` if unset."""
+    options = getattr(method, "__pydantic_rpc_options__", None)
+    if not options:
+        return default
+    return options.get(name, default)
+
+
+class ValidationPolicy:
+    """
+    Controls how request Messages are built from incoming protobuf messages.
+
+    Modes:
+        "full": every request is validated by Pydantic (the default).
+        "trusted": requests are built with `model_construct`, skipping
+            validation. Protobuf has already enforced field types on the wire,
+            so this suits traffic between your own services.
+        "sampled": like "trusted", but one in `sample_rate` requests is fully
+            validated. Violations are counted per method in `violations` and
+            passed to `on_violation(method_name, error)`; the request is still
+            served, built without validation. Counts are updated under a lock,
+            so they stay exact when requests are converted from many threads.
+    """
+
+    MODES = ("full", "trusted", "sampled")
+
+    def __init__(
+        self,
+        mode: str = "full",
+        sample_rate: int = 100,
+        on_violation: Callable[[str, ValidationError], None] | None = None,
+    ) -> None:
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown validation mode: {mode!r}")
+        if sample_rate < 1:
+            raise ValueError("sample_rate must be a positive integer")
+        self.mode = mode
+        self.sample_rate = sample_rate
+        self.on_violation = on_violation
+        self.sampled: collections.Counter[str] = collections.Counter()
+        self.violations: collections.Counter[str] = collections.Counter()
+        self._lock = threading.Lock()
+
+    def build_converter(
+        self, arg_type: Type[Message], pb2_module, method_name: str
+    ) -> Callable:
+        """Return the protobuf -> Python Message converter for one RPC method."""
+        if self.mode == "full":
+            return generate_message_converter(arg_type, pb2_module)
+
+        trusted = generate_message_converter(arg_type, pb2_module, trusted=True)
+        if self.mode == "trusted":
+            return trusted
+
+        validate = generate_message_converter(arg_type, pb2_module)
+        return self._sampled(method_name, trusted, validate)
+
+    def build_kwargs_converter(
+        self, arg_type: Type[Message], method_name: str
+    ) -> Callable:
+        """
+        Like `build_converter`, for requests already parsed into constructor
+        arguments by a wire deserializer (see `get_request_deserializer`).
+        """
+        if self.mode == "full":
+
+            def convert(kwargs):
+                return arg_type(**kwargs)
+
+            return convert
+
+        construct = arg_type.model_construct
+
+        def trusted(kwargs):
+            return construct(**kwargs)
+
+        if self.mode == "trusted":
+            return trusted
+
+        # Nested Messages arrive already constructed, so validate a dump.
+        def validate(kwargs):
+            return arg_type.model_validate(construct(**kwargs).model_dump())
+
+        return self._sampled(method_name, trusted, validate)
+
+    def _sampled(
+        self, method_name: str, trusted: Callable, validate: Callable
+    ) -> Callable:
+        counter = itertools.count()
+        sample_rate = self.sample_rate
+
+        def sampled_converter(request):
+            if next(counter) % sample_rate:
+                return trusted(request)
+            with self._lock:
+                self.sampled[method_name] += 1
+            try:
+                return validate(request)
+            except ValidationError as e:
+                with self._lock:
+                    self.violations[method_name] += 1
+                if self.on_violation is not None:
+                    self.on_violation(method_name, e)
+                return trusted(request)
+
+        return sampled_converter
+
+
+def request_validation(policy: ValidationPolicy | str) -> Callable:
+    """
+    Decorator overriding the server-wide ValidationPolicy for one RPC method.
+
+    Usage:
+        @request_validation("trusted")
+        def say_hello(self, request: HelloRequest) -> HelloReply: ...
+    """
+    if isinstance(policy, str):
+        policy = ValidationPolicy(policy)
+
+    def decorator(func: Callable) -> Callable:
+        return set_method_option(func, "validation", policy)
+
+    return decorator
+
+
+def run_inline(func: Callable) -> Callable:
+    """
+    Decorator marking a sync RPC method as cheap and non-blocking, so async
+    servers call it directly on the event loop instead of offloading it to
+    their executor.
+
+    Usage:
+        @run_inline
+        def version(self, request: Empty) -> VersionReply: ...
+    """
+    return set_method_option(func, "inline", True)
+
+
+def run_in_process(max_workers: int | None = None) -> Callable:
+    """
+    Decorator running a CPU-bound RPC method in a pool of `max_workers`
+    processes (default: the number of CPUs), outside the server's GIL.
+
+    The service object is pickled into each pool process once, when the pool
+    starts, so state it builds there stays warm across requests. Requests and
+    responses are pickled per call. The method must take only the request.
+
+    Usage:
+        @run_in_process(max_workers=4)
+        def score(self, request: Features) -> Score: ...
+    """
+
+    def decorator(func: Callable) -> Callable:
+        return set_method_option(func, "process_pool", {"max_workers": max_workers})
+
+    return decorator
+
+
+DEFAULT_REQUEST_BATCHING = {"max_count": 100, "max_bytes": 1 << 20, "max_wait": 0.05}
+
+
+def batch_requests(
+    max_count: int = DEFAULT_REQUEST_BATCHING["max_count"],
+    max_bytes: int = DEFAULT_REQUEST_BATCHING["max_bytes"],
+    max_wait: float = DEFAULT_REQUEST_BATCHING["max_wait"],
+) -> Callable:
+    """
+    Decorator setting how a method taking `AsyncIterator[list[Req]]` batches
+    its request stream. A batch is delivered once it holds `max_count`
+    requests or `max_bytes` serialized bytes, or `max_wait` seconds after its
+    first request arrived, whichever comes first. Without the decorator
+    these defaults apply.
+
+    Usage:
+        @batch_requests(max_count=500, max_wait=0.1)
+        async def ingest(self, batches: AsyncIterator[list[Record]]) -> Summary: ...
+    """
+    if max_count < 1 or max_bytes < 1 or max_wait < 0:
+        raise ValueError(
+            "max_count and max_bytes must be positive, max_wait not negative"
+        )
+
+    def decorator(func: Callable) -> Callable:
+        return set_method_option(
+            func,
+            "request_batching",
+            {"max_count": max_count, "max_bytes": max_bytes, "max_wait": max_wait},
+        )
+
+    return decorator
+
+
+def merge_string_fields(pending: BaseModel, item: BaseModel) -> BaseModel | None:
+    """
+    Default reducer for `coalesce_responses`: concatenate the `str` fields of
+    two messages of the same type whose other fields are equal. Returns None
+    for messages that can't be merged, including any without `str` fields.
+    """
+    if type(pending) is not type(item):
+        return None
+    update = {}
+    for name, field in type(item).model_fields.items():
+        if field.annotation is str:
+            update[name] = getattr(pending, name) + getattr(item, name)
+        elif getattr(pending, name) != getattr(item, name):
+            return None
+    if not update:
+        return None
+    return pending.model_copy(update=update)
+
+
+def coalesce_responses(
+    max_wait: float = 0.02,
+    max_bytes: int = 4096,
+    reducer: Callable[[BaseModel, BaseModel], BaseModel | None] | None = None,
+) -> Callable:
+    """
+    Decorator merging the responses of a streaming method before they are
+    sent, trading up to `max_wait` seconds of latency for fewer messages.
+    `reducer(pending, item)` returns the merged message, or None if the two
+    can't be merged, in which case the pending one is sent first. A merged
+    message is sent once its `str`/`bytes` fields hold `max_bytes`.
+
+    Usage:
+        @coalesce_responses(max_wait=0.05)
+        async def ask_stream(self, req: Query) -> AsyncIterator[Token]: ...
+    """
+    if max_bytes < 1 or max_wait < 0:
+        raise ValueError("max_bytes must be positive, max_wait not negative")
+
+    def decorator(func: Callable) -> Callable:
+        return set_method_option(
+            func,
+            "response_coalescing",
+            {
+                "reducer": reducer or merge_string_fields,
+                "max_bytes": max_bytes,
+                "max_wait": max_wait,
+            },
+        )
+
+    return decorator
+
+
+def prefetch_responses(depth: int = 8) -> Callable:
+    """
+    Decorator letting a streaming method on `AsyncIOServer` run up to `depth`
+    responses ahead of the client, so producing the next response overlaps
+    with encoding and sending the previous ones. The method is paused while
+    `depth` responses are waiting and cancelled with the call.
+
+    Usage:
+        @prefetch_responses(depth=16)
+        async def export(self, req: Query) -> AsyncIterator[Row]: ...
+    """
+    if depth < 1:
+        raise ValueError("Prefetch depth must be positive")
+
+    def decorator(func: Callable) -> Callable:
+        return set_method_option(func, "response_prefetch", depth)
+
+    return decorator
+
+
+class AdaptiveLimiter:
+    """
+    AIMD (additive increase, multiplicative decrease) concurrency limit for
+    one RPC method.
+
+    The lowest recent latency is the method's no-load baseline. A call slower
+    than `tolerance` times the baseline multiplies the limit by `backoff`. A
+    faster call made while at least half the limit was in use adds one.
+    Calls beyond the limit are rejected with RESOURCE_EXHAUSTED, keeping
+    throughput near the point where queueing starts. `limit` and `in_flight`
+    can be read for metrics.
+    """
+
+    # How quickly the baseline drifts up towards slower latencies.
+    baseline_decay = 0.01
+
+    def __init__(
+        self,
+        initial_limit: int = 20,
+        min_limit: int = 1,
+        max_limit: int = 1000,
+        tolerance: float = 2.0,
+        backoff: float = 0.9,
+    ) -> None:
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("Limits must satisfy 1 <= min <= initial <= max")
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.in_flight = 0
+        self._baseline: float | None = None
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        """Take a slot for a call, or return False if the limit is reached."""
+        with self._lock:
+            if self.in_flight >= int(self.limit):
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self, latency: float | None) -> None:
+        """
+        Return a call's slot and adjust the limit from its latency. Pass None
+        for a call that failed or never ran: its latency says nothing about
+        the method's load.
+        """
+        with self._lock:
+            in_flight = self.in_flight
+            self.in_flight -= 1
+            if latency is None:
+                return
+            if self._baseline is None or latency < self._baseline:
+                self._baseline = latency
+            else:
+                self._baseline += (latency - self._baseline) * self.baseline_decay
+
+            if latency > self._baseline * self.tolerance:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+            elif in_flight * 2 >= self.limit:
+                self.limit = min(self.max_limit, self.limit + 1)
+
+
+def limit_concurrency(limiter: AdaptiveLimiter | None) -> Callable:
+    """
+    Decorator giving one RPC method its own concurrency limiter, overriding
+    the server-wide `concurrency_limiter`; None disables limiting.
+
+    Usage:
+        @limit_concurrency(AdaptiveLimiter(initial_limit=4, max_limit=16))
+        def score(self, request: Features) -> Score: ...
+    """
+
+    def decorator(func: Callable) -> Callable:
+        return set_method_option(func, "concurrency_limiter", limiter)
+
+    return decorator
+
+
+def get_concurrency_limiter(method: Callable, factory=None) -> AdaptiveLimiter | None:
+    """Return the method's own limiter, else a new one from the server's factory."""
+    unset = object()
+    # `@limit_concurrency(None)` exempts the method from the factory.
+    limiter = get_method_option(method, "concurrency_limiter", unset)
+    if limiter is not unset:
+        return limiter
+    return factory() if factory is not None else None
+
+
+COMPRESSION_ALGORITHMS = {
+    "none": grpc.Compression.NoCompression,
+    "gzip": grpc.Compression.Gzip,
+    "deflate": grpc.Compression.Deflate,
+}
+
+
+def compress_response(algorithm: str = "gzip", min_size: int = 0) -> Callable:
+    """
+    Decorator setting the response compression of one RPC method:
+    "gzip", "deflate" or "none". Responses (or stream messages) smaller than
+    `min_size` serialized bytes are sent uncompressed.
+
+    Usage:
+        @compress_response("gzip", min_size=1024)
+        def list_items(self, request: Query) -> Items: ...
+    """
+    if algorithm not in COMPRESSION_ALGORITHMS:
+        raise ValueError(f"Unknown compression algorithm: {algorithm!r}")
+
+    def decorator(func: Callable) -> Callable:
+        return set_method_option(
+            func, "compression", {"algorithm": algorithm, "min_size": min_size}
+        )
+
+    return decorator
+
+
+def lazy_request(validate: bool = True) -> Callable:
+    """
+    Decorator making an RPC method receive a lazy request Message.
+
+    The lazy request wraps the incoming protobuf message and converts each
+    field on first attribute access, caching the result. With `validate=True`
+    each converted field is checked against its annotation and Field
+    constraints; model-level validators are not run. The request is an
+    instance of the declared Message class, so handlers use it unchanged.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        return set_method_option(func, "lazy_request", validate)
+
+    return decorator
+
+
+def _restore_message(message_type: type, state: dict) -> Message:
+    """Rebuild a pickled lazy request as an instance of its Message class."""
+    message = message_type.__new__(message_type)
+    message.__setstate__(state)
+    return message
+
+
+def make_lazy_message_class(
+    arg_type: Type[Message], validate: bool = True
+) -> type[Message]:
+    """
+    Create a subclass of `arg_type` whose fields are converted from a wrapped
+    protobuf message on first access. Build instances with `from_proto`.
+    """
+    fields = arg_type.model_fields
+    field_names = tuple(fields)
+    field_converters = MessageConverterCompiler(trusted=not validate).compile_fields(
+        arg_type
+    )
+    validators = {}
+    if validate:
+        validators = {
+            name: TypeAdapter(
+                Annotated[field_info.annotation, field_info]
+            ).validate_python
+            for name, field_info in fields.items()
+        }
+    fallback_getattr = arg_type.__getattr__  # type: ignore
+    object_setattr = object.__setattr__
+
+    def __getattr__(self, name):
+        convert = field_converters.get(name)
+        if convert is None:
+            return fallback_getattr(self, name)
+        value = convert(self.__pydantic_rpc_source__)
+        if validate:
+            value = validators[name](value)
+        self.__dict__[name] = value
+        return value
+
+    def materialize(self) -> None:
+        """Convert every remaining field, keeping the declared field order."""
+        if len(self.__dict__) != len(field_names):
+            values = {name: getattr(self, name) for name in field_names}
+            object_setattr(self, "__dict__", values)
+
+    def materializing(method_name: str) -> Callable:
+        base = getattr(arg_type, method_name)
+
+        def method(self, *args, **kwargs):
+            materialize(self)
+            return base(self, *args, **kwargs)
+
+        method.__name__ = method_name
+        return method
+
+    def __eq__(self, other):
+        # Lazy and eager instances of the same Message compare by value.
+        materialize(self)
+        if type(other) is lazy_class:
+            materialize(other)
+        elif type(other) is not arg_type:
+            return arg_type.__eq__(self, other)
+        return (
+            self.__dict__ == other.__dict__
+            and self.__pydantic_private__ == other.__pydantic_private__
+            and self.__pydantic_extra__ == other.__pydantic_extra__
+        )
+
+    def __reduce__(self):
+        # The lazy class can't be found by its name, so it pickles as a
+        # fully converted `arg_type` (e.g. for `run_in_process`).
+        materialize(self)
+        return _restore_message, (arg_type, arg_type.__getstate__(self))
+
+    namespace = {
+        "__module__": arg_type.__module__,
+        "__qualname__": arg_type.__qualname__,
+        "__doc__": arg_type.__doc__,
+        "__slots__": ("__pydantic_rpc_source__",),
+        "__getattr__": __getattr__,
+        "__eq__": __eq__,
+        "__reduce__": __reduce__,
+        "__repr_name__": lambda self: arg_type.__name__,
+        **{
+            name: materializing(name)
+            for name in (
+                "model_dump",
+                "model_dump_json",
+                "model_copy",
+                "__copy__",
+                "__deepcopy__",
+                "__iter__",
+                "__repr_args__",
+                "__getstate__",
+            )
+        },
+    }
+    lazy_class = type(arg_type)(f"Lazy{arg_type.__name__}", (arg_type,), namespace)
+
+    def from_proto(request) -> Message:
+        obj = lazy_class.__new__(lazy_class)
+        object_setattr(obj, "__dict__", {})
+        object_setattr(obj, "__pydantic_fields_set__", set(field_names))
+        object_setattr(obj, "__pydantic_extra__", None)
+        object_setattr(obj, "__pydantic_rpc_source__", request)
+        if lazy_class.__pydantic_post_init__:
+            obj.model_post_init(None)
+        else:
+            object_setattr(obj, "__pydantic_private__", None)
+        return obj
+
+    lazy_class.from_proto = staticmethod(from_proto)  # type: ignore
+    return lazy_class
+
+
+# Lazy request classes keyed by (Message class, protobuf descriptor, validate).
+_lazy_message_classes: dict[tuple[type, object, bool], type] = {}
+
+
+def get_lazy_message_class(
+    arg_type: Type[Message], pb2_module=None, validate: bool = True
+) -> type[Message]:
+    """Return the (cached) lazy request class for `arg_type`."""
+    key = (arg_type, get_message_descriptor(arg_type, pb2_module), validate)
+    lazy_class = _lazy_message_classes.get(key)
+    if lazy_class is None:
+        lazy_class = _lazy_message_classes.setdefault(
+            key, make_lazy_message_class(arg_type, validate)
+        )
+    return lazy_class
+
+
+def generate_request_converter(
+    method: Callable,
+    arg_type: Type[Message],
+    pb2_module,
+    validation=None,
+    wire_deserialization: bool = False,
+) -> Callable:
+    """
+    Return the request converter for an RPC method, honoring the method's own
+    ValidationPolicy first and the server-wide one second. Methods decorated
+    with `lazy_request` get lazy requests instead.
+    """
+    lazy_validate = get_method_option(method, "lazy_request")
+    if lazy_validate is not None:
+        return get_lazy_message_class(arg_type, pb2_module, lazy_validate).from_proto  # type: ignore
+
+    policy = get_validation_policy(method, validation)
+    if wire_deserialization:
+        return policy.build_kwargs_converter(arg_type, method.__qualname__)
+    return policy.build_converter(arg_type, pb2_module, method.__qualname__)
+
+
+def get_validation_policy(method: Callable, validation=None) -> ValidationPolicy:
+    """Return the method's own ValidationPolicy, else the server-wide one."""
+    policy = get_method_option(method, "validation", validation)
+    if policy is None:
+        return ValidationPolicy()
+    if isinstance(policy, str):
+        return ValidationPolicy(policy)
+    return policy
+
+
+def get_request_deserializer(
+    method: Callable,
+    arg_type: Type[Message],
+    request_class,
+    validation=None,
+    wire_deserialization: bool = False,
+) -> Callable:
+    """
+    Return the request deserializer to register for an RPC method.
+
+    With `wire_deserialization`, requests are parsed straight from protobuf
+    bytes into constructor arguments, and `generate_request_converter` builds
+    the Message from them. Methods decorated with `lazy_request` keep the pb2
+    deserializer, since they read fields from the pb2 message on demand.
+    """
+    if not uses_wire_deserializer(method, wire_deserialization):
+        return request_class.FromString
+    trusted = get_validation_policy(method, validation).mode != "full"
+    deserializer = get_wire_deserializer(arg_type, trusted)
+    if is_batched_stream(inspect.signature(method)):
+        # Batches are bounded by wire size, which the kwargs no longer show.
+        return lambda data: (len(data), deserializer(data))
+    return deserializer
+
+
+def uses_wire_deserializer(method: Callable, wire_deserialization: bool) -> bool:
+    """Whether a method's requests arrive as kwargs parsed from the wire."""
+    return wire_deserialization and get_method_option(method, "lazy_request") is None
+
+
+###############################################################################
+# 3. Stub implementation
+###############################################################################
+
+
+def connect_obj_with_stub(
+    pb2_grpc_module,
+    pb2_module,
+    service_obj: object,
+    validation=None,
+    wire_serialization: bool = False,
+    wire_deserialization: bool = False,
+    concurrency_limiter=None,
+    process_runners: list | None = None,
+    limiters: dict | None = None,
+) -> type:
     """
     Connect a Python service object to a gRPC stub, generating server methods.
+    `concurrency_limiter` is a factory (such as AdaptiveLimiter) called once per
+    unary method to limit its concurrent calls. Given a `limiters` dict, the
+    limiters are stored in it by full method name, for a
+    ConcurrencyLimitInterceptor, instead of wrapping the stubs. The
+    ProcessMethodRunner of each `run_in_process` method is appended to
+    `process_runners` for the caller to shut down.
     """
     service_class = service_obj.__class__
     stub_class_name = service_class.__name__ + "Servicer"
@@ -193,13 +998,70 @@ def connect_obj_with_stub(pb2_grpc_module, pb2_module, service_obj: object) -> t
     def implement_stub_method(method):
         # Analyze method signature.
         sig = inspect.signature(method)
+        if is_client_stream(sig):
+            raise Exception("Request streams require AsyncIOServer")
         arg_type = get_request_arg_type(sig)
         # Convert request from protobuf to Python.
-        converter = generate_message_converter(arg_type)
+        converter = generate_request_converter(
+            method, arg_type, pb2_module, validation, wire_deserialization
+        )
 
         response_type = sig.return_annotation
         size_of_parameters = len(sig.parameters)
 
+        if is_stream_type(response_type):
+            if get_method_option(method, "process_pool") is not None:
+                raise Exception("run_in_process methods cannot stream responses")
+            item_type = get_args(response_type)[0]
+            encoder = get_response_encoder(
+                item_type, pb2_module, wire_serialization, method
+            )
+            pass_context = size_of_parameters == 2
+            method = coalesce_stream_method(
+                method, get_method_option(method, "response_coalescing")
+            )
+
+            # gRPC pulls the next response only once the previous one has been
+            # accepted by the transport, so buffering is bounded by the
+            # client's HTTP/2 flow-control window and a slow reader holds back
+            # the generator.
+            def stub_method_stream(self, request, context, method=method):
+                try:
+                    arg = converter(request)
+                    args = (arg, context) if pass_context else (arg,)
+                    for resp_obj in method(*args):
+                        yield encoder(resp_obj)
+                except ValidationError as e:
+                    context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+                except Exception as e:
+                    context.abort(grpc.StatusCode.INTERNAL, str(e))
+
+            return stub_method_stream
+
+        encoder = get_response_encoder(
+            response_type, pb2_module, wire_serialization, method
+        )
+
+        if get_method_option(method, "process_pool") is not None:
+            runner = ProcessMethodRunner(method)
+            if process_runners is not None:
+                process_runners.append(runner)
+
+            def stub_method_process(self, request, context):
+                try:
+                    arg = converter(request)
+                    future = runner.submit(arg)
+                    # Drop the call if the client goes away before it starts.
+                    context.add_callback(future.cancel)
+                    resp_obj = future.result()
+                    return encoder(resp_obj)
+                except ValidationError as e:
+                    context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+                except Exception as e:
+                    context.abort(grpc.StatusCode.INTERNAL, str(e))
+
+            return stub_method_process
+
         match size_of_parameters:
             case 1:
 
@@ -210,9 +1072,7 @@ def connect_obj_with_stub(pb2_grpc_module, pb2_module, service_obj: object) -> t
                         # Invoke the actual method
                         resp_obj = method(arg)
                         # Convert the returned Python Message to a protobuf message
-                        return convert_python_message_to_proto(
-                            resp_obj, response_type, pb2_module
-                        )
+                        return encoder(resp_obj)
                     except ValidationError as e:
                         return context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
                     except Exception as e:
@@ -226,9 +1086,7 @@ def connect_obj_with_stub(pb2_grpc_module, pb2_module, service_obj: object) -> t
                     try:
                         arg = converter(request)
                         resp_obj = method(arg, context)
-                        return convert_python_message_to_proto(
-                            resp_obj, response_type, pb2_module
-                        )
+                        return encoder(resp_obj)
                     except ValidationError as e:
                         return context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
                     except Exception as e:
@@ -239,19 +1097,513 @@ def connect_obj_with_stub(pb2_grpc_module, pb2_module, service_obj: object) -> t
             case _:
                 raise Exception("Method must have exactly one or two parameters")
 
+    full_service_name = pb2_module.DESCRIPTOR.services_by_name[
+        service_class.__name__
+    ].full_name
     for method_name, method in get_rpc_methods(service_obj):
         if method.__name__.startswith("_"):
             continue
 
         a_method = implement_stub_method(method)
+        if not is_stream_type(inspect.signature(method).return_annotation):
+            limiter = get_concurrency_limiter(method, concurrency_limiter)
+            if limiters is not None:
+                if limiter is not None:
+                    limiters[f"/{full_service_name}/{method_name}"] = limiter
+            else:
+                a_method = apply_concurrency_limit(
+                    a_method, limiter, grpc.StatusCode.RESOURCE_EXHAUSTED
+                )
+        a_method = apply_response_compression(a_method, method)
         setattr(ConcreteServiceClass, method_name, a_method)
 
     return ConcreteServiceClass
 
 
-def connect_obj_with_stub_async(pb2_grpc_module, pb2_module, obj: object) -> type:
+def make_awaitable_method(method: Callable, executor=None) -> Callable:
+    """
+    Return a coroutine function calling an RPC method. Sync methods run in
+    `executor` (the event loop's default executor if None) so they don't block
+    the loop, unless they are decorated with `run_inline`.
+    """
+    if inspect.iscoroutinefunction(method):
+        return method
+
+    if get_method_option(method, "inline", False):
+
+        async def call_inline(*args):
+            return method(*args)
+
+        return call_inline
+
+    async def call_in_executor(*args):
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        return await loop.run_in_executor(executor, ctx.run, method, *args)
+
+    return call_in_executor
+
+
+async def batch_request_stream(
+    request_iterator,
+    convert: Callable,
+    max_count: int,
+    max_bytes: int,
+    max_wait: float,
+):
+    """
+    Group a request stream into lists (see `batch_requests`). `convert` maps
+    each inbound item to `(size, request)`. While the method works on one
+    batch no requests are read, so a slow method applies backpressure.
+    """
+    loop = asyncio.get_running_loop()
+    requests = aiter(request_iterator)
+    pending = None
+    batch = []
+    size = 0
+    deadline = 0.0
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(anext(requests))
+            timeout = max(deadline - loop.time(), 0) if batch else None
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            if not done:
+                # max_wait passed; the read in progress joins the next batch.
+                yield batch
+                batch, size = [], 0
+                continue
+            read, pending = pending, None
+            try:
+                item = read.result()
+            except StopAsyncIteration:
+                break
+            if not batch:
+                deadline = loop.time() + max_wait
+            item_size, request = convert(item)
+            batch.append(request)
+            size += item_size
+            if len(batch) >= max_count or size >= max_bytes:
+                yield batch
+                batch, size = [], 0
+        if batch:
+            yield batch
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+
+def text_size(message) -> int:
+    """Approximate size of a message: the length of its str and bytes fields."""
+    return sum(
+        len(value)
+        for value in vars(message).values()
+        if isinstance(value, (str, bytes))
+    )
+
+
+def coalesce_response_iter(
+    responses: Iterator, reducer: Callable, max_bytes: int, max_wait: float
+):
+    """
+    Merge a sync response stream (see `coalesce_responses`). The method's
+    generator runs in a helper thread, one response ahead, so a merged
+    response is sent `max_wait` seconds after its first part even while the
+    generator is paused.
+    """
+    items: queue.Queue = queue.Queue(maxsize=1)
+    stopped = threading.Event()
+    end = object()
+
+    def put(entry) -> bool:
+        while not stopped.is_set():
+            try:
+                items.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in responses:
+                if not put((item, None)):
+                    return
+        except Exception as e:
+            put((end, e))
+        else:
+            put((end, None))
+        finally:
+            if hasattr(responses, "close"):
+                responses.close()
+
+    ctx = contextvars.copy_context()
+    threading.Thread(target=ctx.run, args=(produce,), daemon=True).start()
+    pending = None
+    size = 0
+    deadline = 0.0
+    try:
+        while True:
+            timeout = None
+            if pending is not None:
+                timeout = max(deadline - time.monotonic(), 0)
+            try:
+                item, error = items.get(timeout=timeout)
+            except queue.Empty:
+                yield pending
+                pending = None
+                continue
+            if item is end:
+                if error is not None:
+                    raise error
+                break
+            merged = reducer(pending, item) if pending is not None else None
+            if merged is None:
+                if pending is not None:
+                    yield pending
+                pending, size = item, text_size(item)
+                deadline = time.monotonic() + max_wait
+            else:
+                pending = merged
+                size += text_size(item)
+            if size >= max_bytes:
+                yield pending
+                pending = None
+        if pending is not None:
+            yield pending
+    finally:
+        # Stops the helper thread if the call ends early.
+        stopped.set()
+
+
+async def coalesce_response_stream(
+    responses, reducer: Callable, max_bytes: int, max_wait: float
+):
+    """
+    Merge an async response stream (see `coalesce_responses`). A merged
+    response is sent `max_wait` seconds after its first part was produced,
+    even if the method is still working on the next one.
+    """
+    loop = asyncio.get_running_loop()
+    responses = aiter(responses)
+    pending_read = None
+    pending = None
+    size = 0
+    deadline = 0.0
+    try:
+        while True:
+            if pending_read is None:
+                pending_read = asyncio.ensure_future(anext(responses))
+            timeout = None
+            if pending is not None:
+                timeout = max(deadline - loop.time(), 0)
+            done, _ = await asyncio.wait({pending_read}, timeout=timeout)
+            if not done:
+                yield pending
+                pending = None
+                continue
+            read, pending_read = pending_read, None
+            try:
+                item = read.result()
+            except StopAsyncIteration:
+                break
+            merged = reducer(pending, item) if pending is not None else None
+            if merged is None:
+                if pending is not None:
+                    yield pending
+                pending, size = item, text_size(item)
+                deadline = loop.time() + max_wait
+            else:
+                pending = merged
+                size += text_size(item)
+            if size >= max_bytes:
+                yield pending
+                pending = None
+        if pending is not None:
+            yield pending
+    finally:
+        if pending_read is not None:
+            pending_read.cancel()
+
+
+async def prefetch_stream(responses, depth: int):
+    """
+    Iterate an async response stream through a queue of `depth` responses
+    filled by a separate task (see `prefetch_responses`).
+    """
+    queue = asyncio.Queue(maxsize=depth)
+    end = object()
+
+    async def produce():
+        try:
+            async for item in responses:
+                await queue.put((item, None))
+            await queue.put((end, None))
+        except Exception as e:
+            await queue.put((end, e))
+        finally:
+            # A producer cancelled while waiting on a full queue is still
+            # suspended inside the method's generator.
+            if hasattr(responses, "aclose"):
+                await responses.aclose()
+
+    producer = asyncio.ensure_future(produce())
+    try:
+        while True:
+            item, error = await queue.get()
+            if item is end:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
+
+
+def coalesce_stream_method(stream_method: Callable, coalescing) -> Callable:
+    """Wrap a streaming method so its responses are merged per `coalescing`."""
+    if coalescing is None:
+        return stream_method
+
+    if inspect.isgeneratorfunction(stream_method):
+
+        def coalesced_iter(*args):
+            return coalesce_response_iter(stream_method(*args), **coalescing)
+
+        return coalesced_iter
+
+    async def coalesced_stream(*args):
+        async for resp_obj in coalesce_response_stream(
+            stream_method(*args), **coalescing
+        ):
+            yield resp_obj
+
+    return coalesced_stream
+
+
+def prefetch_stream_method(stream_method: Callable, depth: int | None) -> Callable:
+    """Wrap an async streaming method so it runs up to `depth` responses ahead."""
+    if depth is None:
+        return stream_method
+
+    async def prefetched_stream(*args):
+        async for resp_obj in prefetch_stream(stream_method(*args), depth):
+            yield resp_obj
+
+    return prefetched_stream
+
+
+def make_async_iterator_method(method: Callable, executor=None) -> Callable:
+    """
+    Return an async generator function iterating a streaming RPC method. A
+    sync generator runs in `executor` one item at a time, unless it is
+    decorated with `run_inline`.
+    """
+    if inspect.isasyncgenfunction(method) or inspect.iscoroutinefunction(method):
+        return method
+
+    if get_method_option(method, "inline", False):
+
+        async def iterate_inline(*args):
+            for item in method(*args):
+                yield item
+
+        return iterate_inline
+
+    async def iterate_in_executor(*args):
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        iterator = await loop.run_in_executor(executor, ctx.run, method, *args)
+        iterator = iter(iterator)
+        done = object()
+        while True:
+            item = await loop.run_in_executor(executor, ctx.run, next, iterator, done)
+            if item is done:
+                return
+            yield item
+
+    return iterate_in_executor
+
+
+def apply_concurrency_limit(
+    stub: Callable, limiter: AdaptiveLimiter | None, resource_exhausted
+) -> Callable:
+    """
+    Wrap a unary stub so that calls beyond `limiter`'s limit are aborted with
+    `resource_exhausted`, and the latency of every successful call feeds the
+    limiter.
+    """
+    if limiter is None:
+        return stub
+    message = "Concurrency limit exceeded"
+
+    if inspect.iscoroutinefunction(stub):
+
+        async def limited_stub_async(self, request, context):
+            if not limiter.try_acquire():
+                return await context.abort(resource_exhausted, message)
+            start = time.perf_counter()
+            try:
+                response = await stub(self, request, context)
+            except BaseException:
+                limiter.release(None)
+                raise
+            limiter.release(time.perf_counter() - start)
+            return response
+
+        return limited_stub_async
+
+    def limited_stub(self, request, context):
+        if not limiter.try_acquire():
+            return context.abort(resource_exhausted, message)
+        start = time.perf_counter()
+        try:
+            response = stub(self, request, context)
+        except BaseException:
+            limiter.release(None)
+            raise
+        limiter.release(time.perf_counter() - start)
+        return response
+
+    return limited_stub
+
+
+def _response_size(response) -> int:
+    return len(response) if isinstance(response, bytes) else response.ByteSize()
+
+
+def apply_response_compression(stub: Callable, method: Callable) -> Callable:
+    """
+    Wrap a gRPC stub to apply the method's `compress_response` policy with
+    `context.set_compression`. Stream messages below the size threshold are
+    sent with `disable_next_message_compression`. Contexts without these
+    calls (gRPC-Web) are left alone.
+    """
+    policy = get_method_option(method, "compression")
+    if policy is None:
+        return stub
+    algorithm = COMPRESSION_ALGORITHMS[policy["algorithm"]]
+    min_size = policy["min_size"]
+
+    def set_compression(context, size: int) -> None:
+        if hasattr(context, "set_compression"):
+            compress = size >= min_size
+            context.set_compression(
+                algorithm if compress else grpc.Compression.NoCompression
+            )
+
+    def skip_small(context, response) -> None:
+        if _response_size(response) < min_size and hasattr(
+            context, "disable_next_message_compression"
+        ):
+            context.disable_next_message_compression()
+
+    if inspect.isasyncgenfunction(stub):
+
+        async def compressed_stream_async(self, request, context):
+            set_compression(context, min_size)
+            async for response in stub(self, request, context):
+                skip_small(context, response)
+                yield response
+
+        return compressed_stream_async
+
+    if inspect.isgeneratorfunction(stub):
+
+        def compressed_stream(self, request, context):
+            set_compression(context, min_size)
+            for response in stub(self, request, context):
+                skip_small(context, response)
+                yield response
+
+        return compressed_stream
+
+    if inspect.iscoroutinefunction(stub):
+
+        async def compressed_stub_async(self, request, context):
+            response = await stub(self, request, context)
+            set_compression(context, _response_size(response))
+            return response
+
+        return compressed_stub_async
+
+    def compressed_stub(self, request, context):
+        response = stub(self, request, context)
+        set_compression(context, _response_size(response))
+        return response
+
+    return compressed_stub
+
+
+# The service object of a run_in_process pool process.
+_process_service = None
+
+
+def _init_process_service(obj: object) -> None:
+    global _process_service
+    _process_service = obj
+
+
+def _call_process_service(method_name: str, request):
+    return getattr(_process_service, method_name)(request)
+
+
+class ProcessMethodRunner:
+    """
+    Runs one `run_in_process` RPC method in its own process pool. The pool is
+    created on first use, so pre-fork workers each start their own, and uses
+    the "spawn" start method because forking a process running gRPC is unsafe.
+    """
+
+    def __init__(self, method: Callable) -> None:
+        if len(inspect.signature(method).parameters) != 1:
+            raise Exception("run_in_process methods must take only the request")
+        options = get_method_option(method, "process_pool")
+        self._obj = method.__self__  # type: ignore
+        self._method_name = method.__name__
+        self._max_workers = options["max_workers"]
+        self._executor: futures.ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, request) -> futures.Future:
+        """Start the method on a request; the future resolves to the response."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = futures.ProcessPoolExecutor(
+                    self._max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_process_service,
+                    initargs=(self._obj,),
+                )
+        return self._executor.submit(_call_process_service, self._method_name, request)
+
+    def shutdown(self) -> None:
+        """Stop the process pool; it is recreated if the method is called again."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+
+
+def connect_obj_with_stub_async(
+    pb2_grpc_module,
+    pb2_module,
+    obj: object,
+    validation=None,
+    wire_serialization: bool = False,
+    wire_deserialization: bool = False,
+    executor=None,
+    concurrency_limiter=None,
+    process_runners: list | None = None,
+) -> type:
     """
     Connect a Python service object to a gRPC stub for async methods.
+    Sync methods are offloaded to `executor` (see `make_awaitable_method`).
+    `concurrency_limiter` and `process_runners` work as in
+    `connect_obj_with_stub`.
+    Methods taking an `AsyncIterator` of requests become client-streaming, or
+    bidirectional-streaming when they also return an `AsyncIterator`.
     """
     service_class = obj.__class__
     stub_class_name = service_class.__name__ + "Servicer"
@@ -263,12 +1615,30 @@ def connect_obj_with_stub_async(pb2_grpc_module, pb2_module, obj: object) -> typ
     def implement_stub_method(method):
         sig = inspect.signature(method)
         arg_type = get_request_arg_type(sig)
-        converter = generate_message_converter(arg_type)
+        converter = generate_request_converter(
+            method, arg_type, pb2_module, validation, wire_deserialization
+        )
         response_type = sig.return_annotation
         size_of_parameters = len(sig.parameters)
 
+        if is_client_stream(sig):
+            return implement_client_stream_method(
+                method, converter, response_type, size_of_parameters == 2
+            )
+
         if is_stream_type(response_type):
             item_type = get_args(response_type)[0]
+            encoder = get_response_encoder(
+                item_type, pb2_module, wire_serialization, method
+            )
+            coalescing = get_method_option(method, "response_coalescing")
+            method = coalesce_stream_method(
+                prefetch_stream_method(
+                    make_async_iterator_method(method, executor),
+                    get_method_option(method, "response_prefetch"),
+                ),
+                coalescing,
+            )
             match size_of_parameters:
                 case 1:
 
@@ -278,9 +1648,7 @@ def connect_obj_with_stub_async(pb2_grpc_module, pb2_module, obj: object) -> typ
                         try:
                             arg = converter(request)
                             async for resp_obj in method(arg):
-                                yield convert_python_message_to_proto(
-                                    resp_obj, item_type, pb2_module
-                                )
+                                yield encoder(resp_obj)
                         except ValidationError as e:
                             await context.abort(
                                 grpc.StatusCode.INVALID_ARGUMENT, str(e)
@@ -297,9 +1665,7 @@ def connect_obj_with_stub_async(pb2_grpc_module, pb2_module, obj: object) -> typ
                         try:
                             arg = converter(request)
                             async for resp_obj in method(arg, context):
-                                yield convert_python_message_to_proto(
-                                    resp_obj, item_type, pb2_module
-                                )
+                                yield encoder(resp_obj)
                         except ValidationError as e:
                             await context.abort(
                                 grpc.StatusCode.INVALID_ARGUMENT, str(e)
@@ -311,6 +1677,29 @@ def connect_obj_with_stub_async(pb2_grpc_module, pb2_module, obj: object) -> typ
                 case _:
                     raise Exception("Method must have exactly one or two parameters")
 
+        encoder = get_response_encoder(
+            response_type, pb2_module, wire_serialization, method
+        )
+
+        if get_method_option(method, "process_pool") is not None:
+            runner = ProcessMethodRunner(method)
+            if process_runners is not None:
+                process_runners.append(runner)
+
+            async def stub_method_process(self, request, context):
+                try:
+                    arg = converter(request)
+                    # Cancelling the RPC cancels the call if it hasn't started.
+                    resp_obj = await asyncio.wrap_future(runner.submit(arg))
+                    return encoder(resp_obj)
+                except ValidationError as e:
+                    await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+                except Exception as e:
+                    await context.abort(grpc.StatusCode.INTERNAL, str(e))
+
+            return stub_method_process
+
+        method = make_awaitable_method(method, executor)
         match size_of_parameters:
             case 1:
 
@@ -318,9 +1707,7 @@ def connect_obj_with_stub_async(pb2_grpc_module, pb2_module, obj: object) -> typ
                     try:
                         arg = converter(request)
                         resp_obj = await method(arg)
-                        return convert_python_message_to_proto(
-                            resp_obj, response_type, pb2_module
-                        )
+                        return encoder(resp_obj)
                     except ValidationError as e:
                         await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
                     except Exception as e:
@@ -334,9 +1721,7 @@ def connect_obj_with_stub_async(pb2_grpc_module, pb2_module, obj: object) -> typ
                     try:
                         arg = converter(request)
                         resp_obj = await method(arg, context)
-                        return convert_python_message_to_proto(
-                            resp_obj, response_type, pb2_module
-                        )
+                        return encoder(resp_obj)
                     except ValidationError as e:
                         await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
                     except Exception as e:
@@ -347,17 +1732,102 @@ def connect_obj_with_stub_async(pb2_grpc_module, pb2_module, obj: object) -> typ
             case _:
                 raise Exception("Method must have exactly one or two parameters")
 
+    def implement_client_stream_method(method, converter, response_type, pass_context):
+        if not (
+            inspect.iscoroutinefunction(method) or inspect.isasyncgenfunction(method)
+        ):
+            raise Exception("Methods receiving a request stream must be async")
+
+        async def convert_requests(request_iterator):
+            # Each request is converted only when the method asks for it.
+            async for request in request_iterator:
+                yield converter(request)
+
+        if is_batched_stream(inspect.signature(method)):
+            batching = get_method_option(
+                method, "request_batching", DEFAULT_REQUEST_BATCHING
+            )
+            if uses_wire_deserializer(method, wire_deserialization):
+
+                def convert(item):
+                    size, request = item
+                    return size, converter(request)
+
+            else:
+
+                def convert(request):
+                    return request.ByteSize(), converter(request)
+
+            def convert_requests(request_iterator):
+                return batch_request_stream(request_iterator, convert, **batching)
+
+        if is_stream_type(response_type):
+            item_type = get_args(response_type)[0]
+            encoder = get_response_encoder(
+                item_type, pb2_module, wire_serialization, method
+            )
+
+            stream_method = coalesce_stream_method(
+                prefetch_stream_method(
+                    method, get_method_option(method, "response_prefetch")
+                ),
+                get_method_option(method, "response_coalescing"),
+            )
+
+            async def stub_method_bidi_stream(
+                self, request_iterator, context, method=stream_method
+            ):
+                requests = convert_requests(request_iterator)
+                args = (requests, context) if pass_context else (requests,)
+                try:
+                    async for resp_obj in method(*args):
+                        yield encoder(resp_obj)
+                except ValidationError as e:
+                    await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+                except Exception as e:
+                    await context.abort(grpc.StatusCode.INTERNAL, str(e))
+
+            return stub_method_bidi_stream
+
+        encoder = get_response_encoder(
+            response_type, pb2_module, wire_serialization, method
+        )
+
+        async def stub_method_client_stream(
+            self, request_iterator, context, method=method
+        ):
+            requests = convert_requests(request_iterator)
+            args = (requests, context) if pass_context else (requests,)
+            try:
+                resp_obj = await method(*args)
+                return encoder(resp_obj)
+            except ValidationError as e:
+                await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+            except Exception as e:
+                await context.abort(grpc.StatusCode.INTERNAL, str(e))
+
+        return stub_method_client_stream
+
     for method_name, method in get_rpc_methods(obj):
         if method.__name__.startswith("_"):
             continue
 
         a_method = implement_stub_method(method)
+        sig = inspect.signature(method)
+        if not (is_stream_type(sig.return_annotation) or is_client_stream(sig)):
+            limiter = get_concurrency_limiter(method, concurrency_limiter)
+            a_method = apply_concurrency_limit(
+                a_method, limiter, grpc.StatusCode.RESOURCE_EXHAUSTED
+            )
+        a_method = apply_response_compression(a_method, method)
         setattr(ConcreteServiceClass, method_name, a_method)
 
     return ConcreteServiceClass
 
 
-def connect_obj_with_stub_connecpy(connecpy_module, pb2_module, obj: object) -> type:
+def connect_obj_with_stub_connecpy(
+    connecpy_module, pb2_module, obj: object, validation=None, concurrency_limiter=None
+) -> type:
     """
     Connect a Python service object to a Connecpy stub.
     """
@@ -370,10 +1840,13 @@ def connect_obj_with_stub_connecpy(connecpy_module, pb2_module, obj: object) ->
 
     def implement_stub_method(method):
         sig = inspect.signature(method)
+        if is_client_stream(sig) or is_stream_type(sig.return_annotation):
+            raise Exception("Connecpy does not support streaming RPCs")
         arg_type = get_request_arg_type(sig)
-        converter = generate_message_converter(arg_type)
+        converter = generate_request_converter(method, arg_type, pb2_module, validation)
         response_type = sig.return_annotation
         size_of_parameters = len(sig.parameters)
+        encoder = get_message_encoder(response_type, pb2_module)
 
         match size_of_parameters:
             case 1:
@@ -382,9 +1855,7 @@ def connect_obj_with_stub_connecpy(connecpy_module, pb2_module, obj: object) ->
                     try:
                         arg = converter(request)
                         resp_obj = method(arg)
-                        return convert_python_message_to_proto(
-                            resp_obj, response_type, pb2_module
-                        )
+                        return encoder(resp_obj)
                     except ValidationError as e:
                         return context.abort(Errors.InvalidArgument, str(e))
                     except Exception as e:
@@ -398,9 +1869,7 @@ def connect_obj_with_stub_connecpy(connecpy_module, pb2_module, obj: object) ->
                     try:
                         arg = converter(request)
                         resp_obj = method(arg, context)
-                        return convert_python_message_to_proto(
-                            resp_obj, response_type, pb2_module
-                        )
+                        return encoder(resp_obj)
                     except ValidationError as e:
                         return context.abort(Errors.InvalidArgument, str(e))
                     except Exception as e:
@@ -415,16 +1884,24 @@ def connect_obj_with_stub_connecpy(connecpy_module, pb2_module, obj: object) ->
         if method.__name__.startswith("_"):
             continue
         a_method = implement_stub_method(method)
+        limiter = get_concurrency_limiter(method, concurrency_limiter)
+        a_method = apply_concurrency_limit(a_method, limiter, Errors.ResourceExhausted)
         setattr(ConcreteServiceClass, method_name, a_method)
 
     return ConcreteServiceClass
 
 
 def connect_obj_with_stub_async_connecpy(
-    connecpy_module, pb2_module, obj: object
+    connecpy_module,
+    pb2_module,
+    obj: object,
+    validation=None,
+    executor=None,
+    concurrency_limiter=None,
 ) -> type:
     """
     Connect a Python service object to a Connecpy stub for async methods.
+    Sync methods are offloaded to `executor` (see `make_awaitable_method`).
     """
     service_class = obj.__class__
     stub_class_name = service_class.__name__
@@ -435,10 +1912,14 @@ def connect_obj_with_stub_async_connecpy(
 
     def implement_stub_method(method):
         sig = inspect.signature(method)
+        if is_client_stream(sig) or is_stream_type(sig.return_annotation):
+            raise Exception("Connecpy does not support streaming RPCs")
         arg_type = get_request_arg_type(sig)
-        converter = generate_message_converter(arg_type)
+        converter = generate_request_converter(method, arg_type, pb2_module, validation)
         response_type = sig.return_annotation
         size_of_parameters = len(sig.parameters)
+        encoder = get_message_encoder(response_type, pb2_module)
+        method = make_awaitable_method(method, executor)
 
         match size_of_parameters:
             case 1:
@@ -447,9 +1928,7 @@ def connect_obj_with_stub_async_connecpy(
                     try:
                         arg = converter(request)
                         resp_obj = await method(arg)
-                        return convert_python_message_to_proto(
-                            resp_obj, response_type, pb2_module
-                        )
+                        return encoder(resp_obj)
                     except ValidationError as e:
                         await context.abort(Errors.InvalidArgument, str(e))
                     except Exception as e:
@@ -463,9 +1942,7 @@ def connect_obj_with_stub_async_connecpy(
                     try:
                         arg = converter(request)
                         resp_obj = await method(arg, context)
-                        return convert_python_message_to_proto(
-                            resp_obj, response_type, pb2_module
-                        )
+                        return encoder(resp_obj)
                     except ValidationError as e:
                         await context.abort(Errors.InvalidArgument, str(e))
                     except Exception as e:
@@ -479,14 +1956,163 @@ def connect_obj_with_stub_async_connecpy(
     for method_name, method in get_rpc_methods(obj):
         if method.__name__.startswith("_"):
             continue
-        if not asyncio.iscoroutinefunction(method):
-            raise Exception("Method must be async", method_name)
         a_method = implement_stub_method(method)
+        limiter = get_concurrency_limiter(method, concurrency_limiter)
+        a_method = apply_concurrency_limit(a_method, limiter, Errors.ResourceExhausted)
         setattr(ConcreteServiceClass, method_name, a_method)
 
     return ConcreteServiceClass
 
 
+class MessageEncoderCompiler(FunctionCompiler):
+    """
+    Compile Python Message -> protobuf encoders for one pb2 module.
+
+    The encoder plan is decided once per field: the target proto class, the
+    conversion applied to the value and the encoders of nested Message types
+    are all bound when the function is generated, not looked up per call.
+    """
+
+    kind = "encoder"
+
+    def __init__(self, pb2_module) -> None:
+        super().__init__()
+        self._pb2_module = pb2_module
+
+    def _function_source(self, message_type: type, name: str) -> str:
+        proto_class = self._constant(
+            "Proto", getattr(self._pb2_module, message_type.__name__)
+        )
+        lines = [f"def {name}(msg):"]
+        args = []
+        for i, (field_name, field_info) in enumerate(
+            message_type.model_fields.items()  # type: ignore
+        ):
+            local = f"f{i}"
+            if is_union_type(field_info.annotation):
+                oneof = self._oneof_encoder(field_name, field_info.annotation)  # type: ignore
+                args.append(f"**{oneof}(msg.{field_name})")
+                continue
+            expr = self._value_expr(field_info.annotation, local)  # type: ignore
+            if expr is None:
+                args.append(f"{field_name}=msg.{field_name}")
+            else:
+                lines.append(f"    {local} = msg.{field_name}")
+                args.append(f"{field_name}=None if {local} is None else {expr}")
+        lines.append(f"    return {proto_class}({', '.join(args)})")
+        return "\n".join(lines) + "\n"
+
+    def _value_expr(self, field_type: Type, src: str) -> str | None:
+        """Return an expression converting `src`, or None if it is passed as-is."""
+        if field_type == datetime.datetime:
+            return f"{self._constant('to_timestamp', python_to_timestamp)}({src})"
+
+        if field_type == datetime.timedelta:
+            return f"{self._constant('to_duration', python_to_duration)}({src})"
+
+        if is_enum_type(field_type):
+            return f"{src}.value"  # proto3 enum is an int
+
+        origin = get_origin(field_type)
+        if origin in (list, tuple):
+            var = self._name("v")
+            item_expr = self._value_expr(get_args(field_type)[0], var)
+            if item_expr is None:
+                return None
+            return f"[{item_expr} for {var} in {src}]"
+
+        if origin is dict:
+            key_type, value_type = get_args(field_type)
+            k, v = self._name("k"), self._name("v")
+            key_expr = self._value_expr(key_type, k)
+            value_expr = self._value_expr(value_type, v)
+            if key_expr is None and value_expr is None:
+                return None
+            return (
+                f"{{{key_expr or k}: {value_expr or v} for {k}, {v} in {src}.items()}}"
+            )
+
+        if inspect.isclass(field_type) and issubclass(field_type, Message):
+            return f"{self._function_for(field_type)}({src})"
+
+        # If primitive
+        return None
+
+    def _oneof_encoder(self, field_name: str, field_type: Type) -> str:
+        """
+        Generate a function returning the oneof member kwargs for a union value.
+        The member is chosen by `type(value)`; subclasses of member types are
+        resolved through their MRO once and then cached in the dispatch table.
+        """
+        entries = []
+        for member_type in flatten_union(field_type):
+            key = self._constant("member_type", member_type)
+            expr = self._value_expr(member_type, "value")
+            convert = "None"
+            if expr is not None:
+                convert = self._name("member_")
+                self._helpers.append(f"def {convert}(value):\n    return {expr}\n")
+            member_name = oneof_member_name(field_name, member_type)
+            entries.append(f"{key}: ({member_name!r}, {convert})")
+        name = self._name("oneof_")
+        resolve = self._constant("resolve", resolve_oneof_member)
+        self._helpers.append(
+            f"{name}_dispatch = {{{', '.join(entries)}}}\n"
+            f"def {name}(value):\n"
+            f"    if value is None:\n"
+            f"        return {{}}\n"
+            f"    entry = {name}_dispatch.get(type(value))\n"
+            f"    if entry is None:\n"
+            f"        entry = {resolve}({name}_dispatch, type(value))\n"
+            f"        if entry is None:\n"
+            f"            return {{}}\n"
+            f"    member_name, convert = entry\n"
+            f"    return {{member_name: value if convert is None else convert(value)}}\n"
+        )
+        return name
+
+
+def resolve_oneof_member(dispatch: dict, value_type: type) -> tuple | None:
+    """Find the oneof member for a subclass of a member type and cache it."""
+    for base in value_type.__mro__[1:]:
+        entry = dispatch.get(base)
+        if entry is not None:
+            dispatch[value_type] = entry
+            return entry
+    return None
+
+
+# Compiled encoders keyed by (Message class, pb2 module).
+_message_encoders: dict[tuple[type, object], Callable] = {}
+
+
+def get_message_encoder(msg_type: Type, pb2_module) -> Callable:
+    """Return the compiled Python Message -> protobuf encoder for `msg_type`."""
+    key = (msg_type, pb2_module)
+    encoder = _message_encoders.get(key)
+    if encoder is None:
+        encoder = _message_encoders.setdefault(
+            key, MessageEncoderCompiler(pb2_module).compile(msg_type)
+        )
+    return encoder
+
+
+def get_response_encoder(
+    response_type: Type, pb2_module, wire_serialization: bool = False, method=None
+) -> Callable:
+    """
+    Return the function a stub applies to a method's return value. With wire
+    serialization the Message itself goes to the method's response_serializer,
+    unless the method compresses responses by size: then the stub serializes
+    it, so the size is known when compression is chosen.
+    """
+    if wire_serialization:
+        if method is not None and get_method_option(method, "compression"):
+            return get_wire_serializer(response_type)
+        return primitiveProtoValueToPythonValue
+    return get_message_encoder(response_type, pb2_module)
+
+
 def convert_python_message_to_proto(
     py_msg: Message, msg_type: Type, pb2_module
 ) -> object:
@@ -494,94 +2120,569 @@ def convert_python_message_to_proto(
     Convert a Python Pydantic Message instance to a protobuf message instance.
     Used for constructing a response.
     """
-    # Before calling something like pb2_module.AResponseMessage(...),
-    # convert each field from Python to proto.
-    field_dict = {}
-    for name, field_info in msg_type.model_fields.items():
-        value = getattr(py_msg, name)
-        if value is None:
-            field_dict[name] = None
-            continue
+    return get_message_encoder(msg_type, pb2_module)(py_msg)
+
+
+###############################################################################
+# 4. Protobuf wire format
+#    (Python Message <-> serialized protobuf bytes, without pb2 objects)
+###############################################################################
+
+
+_pack_float = struct.Struct("<f").pack
+_unpack_float = struct.Struct("<f").unpack_from
+_EPOCH = datetime.datetime(1970, 1, 1)
+_EPOCH_UTC = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def write_varint(out: bytearray, value: int) -> None:
+    """Append a non-negative integer as a base-128 varint."""
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def write_int32(out: bytearray, value: int) -> None:
+    """Append an int32 value; negative values take ten bytes, as in protobuf."""
+    if not -0x80000000 <= value <= 0x7FFFFFFF:
+        raise ValueError(f"Value out of range: {value}")
+    write_varint(out, value & 0xFFFFFFFFFFFFFFFF)
 
-        field_type = field_info.annotation
-        field_dict[name] = python_value_to_proto(field_type, value, pb2_module)
 
-    # Retrieve the appropriate protobuf class dynamically
-    proto_class = getattr(pb2_module, msg_type.__name__)
-    return proto_class(**field_dict)
+def wire_tag(number: int, wire_type: int) -> bytes:
+    """Return the encoded key of a field."""
+    out = bytearray()
+    write_varint(out, number << 3 | wire_type)
+    return bytes(out)
 
 
-def python_value_to_proto(field_type: Type, value, pb2_module):
+def timestamp_to_wire(dt: datetime.datetime) -> bytearray:
+    """Encode a datetime as a google.protobuf.Timestamp (naive means UTC)."""
+    delta = dt - (_EPOCH if dt.tzinfo is None else _EPOCH_UTC)
+    return _seconds_nanos_to_wire(
+        delta.days * 86400 + delta.seconds, delta.microseconds * 1000
+    )
+
+
+def duration_to_wire(td: datetime.timedelta) -> bytearray:
+    """Encode a timedelta as a google.protobuf.Duration."""
+    seconds = td.days * 86400 + td.seconds
+    nanos = td.microseconds * 1000
+    # Duration requires seconds and nanos to have the same sign.
+    if seconds < 0 and nanos > 0:
+        seconds += 1
+        nanos -= 1_000_000_000
+    return _seconds_nanos_to_wire(seconds, nanos)
+
+
+def _seconds_nanos_to_wire(seconds: int, nanos: int) -> bytearray:
+    out = bytearray()
+    if seconds:
+        out += b"\x08"
+        write_varint(out, seconds & 0xFFFFFFFFFFFFFFFF)
+    if nanos:
+        out += b"\x10"
+        write_int32(out, nanos)
+    return out
+
+
+class WireSerializerCompiler(FunctionCompiler):
     """
-    Perform Python->protobuf type conversion for each field value.
+    Compile Python Message -> protobuf wire bytes serializers.
+
+    Field numbers come from `proto_field_numbers`, the same numbering the
+    generated .proto file uses, so the output is what the pb2 classes would
+    produce without building an intermediate pb2 object graph. Each generated
+    function returns a bytearray; nested Messages are length-prefixed.
     """
-    import inspect
-    import datetime
 
-    # If datetime
-    if field_type == datetime.datetime:
-        return python_to_timestamp(value)
+    kind = "serializer"
+
+    def _function_source(self, message_type: type, name: str) -> str:
+        numbers = proto_field_numbers(message_type)  # type: ignore
+        lines = [f"def {name}(msg):", "    out = bytearray()"]
+        for field_name, field_info in message_type.model_fields.items():  # type: ignore
+            var = self._name("v")
+            lines.append(f"    {var} = msg.{field_name}")
+            annotation = field_info.annotation
+            if is_union_type(annotation):
+                oneof = self._oneof_writer(numbers[field_name])  # type: ignore
+                lines.append(f"    if {var} is not None:")
+                lines.append(f"        {oneof}(out, {var})")
+            else:
+                stmts = self._field_stmts(annotation, numbers[field_name], var, "out")  # type: ignore
+                lines.extend("    " + line for line in stmts)
+        lines.append("    return out")
+        return "\n".join(lines) + "\n"
+
+    def _field_stmts(
+        self,
+        annotation: Type,
+        number: int,
+        var: str,
+        out: str,
+        explicit: bool = False,
+    ) -> list[str]:
+        """
+        Return statements writing field `number` with value `var` to `out`.
+        Unless `explicit`, proto3 default values are skipped like protoc does.
+        """
+        origin = get_origin(annotation)
+        if origin in (list, tuple):
+            item_type = get_args(annotation)[0]
+            item = self._name("x")
+            if self._wire_type(item_type) != 2:
+                # Repeated scalars are packed.
+                packed = self._name("packed")
+                return [
+                    f"if {var}:",
+                    f"    {packed} = bytearray()",
+                    f"    for {item} in {var}:",
+                    *(
+                        "        " + line
+                        for line in self._value_stmts(item_type, item, packed)
+                    ),
+                    f"    {out} += {wire_tag(number, 2)!r}",
+                    f"    write_varint({out}, len({packed}))",
+                    f"    {out} += {packed}",
+                ]
+            stmts = self._field_stmts(item_type, number, item, out, explicit=True)
+            return [f"for {item} in {var}:", *("    " + line for line in stmts)]
 
-    # If timedelta
-    if field_type == datetime.timedelta:
-        return python_to_duration(value)
+        if origin is dict:
+            key_type, value_type = get_args(annotation)
+            k, v, entry = self._name("k"), self._name("v"), self._name("entry")
+            return [
+                f"for {k}, {v} in {var}.items():",
+                f"    {entry} = bytearray()",
+                *(
+                    "    " + line
+                    for line in self._field_stmts(key_type, 1, k, entry, True)
+                    + self._field_stmts(value_type, 2, v, entry, True)
+                ),
+                f"    {out} += {wire_tag(number, 2)!r}",
+                f"    write_varint({out}, len({entry}))",
+                f"    {out} += {entry}",
+            ]
+
+        wire_type = self._wire_type(annotation)
+        stmts = [
+            f"{out} += {wire_tag(number, wire_type)!r}",
+            *self._value_stmts(annotation, var, out),
+        ]
+        if explicit:
+            return stmts
+        if is_enum_type(annotation):
+            condition = f"{var} is not None and {var}.value"
+        elif annotation in (int, str, bool, bytes, float):
+            condition = var
+        else:
+            condition = f"{var} is not None"
+        return [f"if {condition}:", *("    " + line for line in stmts)]
+
+    def _value_stmts(self, annotation: Type, var: str, out: str) -> list[str]:
+        """Return statements writing the value `var` (without its key) to `out`."""
+        if annotation is int:
+            return [f"write_int32({out}, {var})"]
+        if annotation is bool:
+            return [f"{out}.append(1 if {var} else 0)"]
+        if annotation is float:
+            return [f"{out} += pack_float({var})"]
+        if is_enum_type(annotation):
+            return [f"write_int32({out}, {var}.value)"]
+
+        data = self._name("b")
+        if annotation is str:
+            encode = [f"{data} = {var}.encode()"]
+        elif annotation is bytes:
+            encode = [f"{data} = {var}"]
+        elif annotation == datetime.datetime:
+            encode = [f"{data} = timestamp_to_wire({var})"]
+        elif annotation == datetime.timedelta:
+            encode = [f"{data} = duration_to_wire({var})"]
+        elif inspect.isclass(annotation) and issubclass(annotation, Message):
+            encode = [f"{data} = {self._function_for(annotation)}({var})"]
+        else:
+            raise TypeError(f"Type {annotation} is not supported.")
+        return [*encode, f"write_varint({out}, len({data}))", f"{out} += {data}"]
+
+    def _wire_type(self, annotation: Type) -> int:
+        if annotation in (int, bool) or is_enum_type(annotation):
+            return 0
+        if annotation is float:
+            return 5
+        return 2
 
-    # If enum
-    if inspect.isclass(field_type) and issubclass(field_type, enum.Enum):
-        return value.value  # proto3 enum is an int
-
-    origin = get_origin(field_type)
-    # If seq
-    if origin in (list, tuple):
-        inner_type = get_args(field_type)[0]  # type: ignore
-        return [python_value_to_proto(inner_type, v, pb2_module) for v in value]
-
-    # If dict
-    if origin is dict:
-        key_type, val_type = get_args(field_type)  # type: ignore
-        return {
-            python_value_to_proto(key_type, k, pb2_module): python_value_to_proto(
-                val_type, v, pb2_module
+    def _oneof_writer(self, members: list[tuple[Type, int]]) -> str:
+        """
+        Generate a function writing a union value as its oneof member.
+        Oneof members have explicit presence, so defaults are written too.
+        """
+        entries = []
+        for member_type, number in members:
+            write = self._name("member_")
+            stmts = self._field_stmts(member_type, number, "value", "out", True)
+            self._helpers.append(
+                f"def {write}(out, value):\n"
+                + "".join(f"    {line}\n" for line in stmts)
             )
-            for k, v in value.items()
-        }
+            entries.append(f"{self._constant('member_type', member_type)}: {write}")
+        name = self._name("oneof_")
+        self._helpers.append(
+            f"{name}_dispatch = {{{', '.join(entries)}}}\n"
+            f"def {name}(out, value):\n"
+            f"    write = {name}_dispatch.get(type(value))\n"
+            f"    if write is None:\n"
+            f"        write = resolve_oneof_member({name}_dispatch, type(value))\n"
+            f"        if write is None:\n"
+            f"            return\n"
+            f"    write(out, value)\n"
+        )
+        return name
+
+    def compile(self, message_type: Type[Message]) -> Callable:
+        self._namespace.update(
+            write_varint=write_varint,
+            write_int32=write_int32,
+            pack_float=_pack_float,
+            timestamp_to_wire=timestamp_to_wire,
+            duration_to_wire=duration_to_wire,
+            resolve_oneof_member=resolve_oneof_member,
+        )
+        serialize = super().compile(message_type)
 
-    # If union -> oneof
-    if is_union_type(field_type):
-        # Flatten union and check which type matches. If matched, return converted value.
-        for sub_type in flatten_union(field_type):
-            if sub_type == datetime.datetime and isinstance(value, datetime.datetime):
-                return python_to_timestamp(value)
-            if sub_type == datetime.timedelta and isinstance(value, datetime.timedelta):
-                return python_to_duration(value)
-            if (
-                inspect.isclass(sub_type)
-                and issubclass(sub_type, enum.Enum)
-                and isinstance(value, enum.Enum)
-            ):
-                return value.value
-            if sub_type in (int, float, str, bool, bytes) and isinstance(
-                value, sub_type
-            ):
-                return value
-            if (
-                inspect.isclass(sub_type)
-                and issubclass(sub_type, Message)
-                and isinstance(value, Message)
-            ):
-                return convert_python_message_to_proto(value, sub_type, pb2_module)
-        return None
+        def serializer(msg) -> bytes:
+            return bytes(serialize(msg))
+
+        return serializer
+
+
+# Wire serializers keyed by Message class.
+_wire_serializers: dict[type, Callable] = {}
+
+
+def get_wire_serializer(msg_type: Type[Message]) -> Callable:
+    """Return the compiled Python Message -> protobuf bytes serializer."""
+    serializer = _wire_serializers.get(msg_type)
+    if serializer is None:
+        serializer = _wire_serializers.setdefault(
+            msg_type, WireSerializerCompiler().compile(msg_type)
+        )
+    return serializer
+
+
+def read_varint(data: bytes, pos: int) -> tuple[int, int]:
+    """Read a base-128 varint at `pos`; return (value, new position)."""
+    result = 0
+    shift = 0
+    try:
+        while True:
+            b = data[pos]
+            pos += 1
+            result |= (b & 0x7F) << shift
+            if b < 0x80:
+                return result, pos
+            shift += 7
+    except IndexError:
+        raise DecodeError("Truncated varint") from None
+
+
+def read_size(data: bytes, pos: int, end: int) -> tuple[int, int]:
+    """Read the length of a length-delimited value ending by `end`."""
+    size, pos = read_varint(data, pos)
+    if pos + size > end:
+        raise DecodeError("Truncated length-delimited field")
+    return size, pos
+
+
+def to_int32(value: int) -> int:
+    """Interpret a decoded varint as a signed int32."""
+    value &= 0xFFFFFFFF
+    return value - 0x100000000 if value > 0x7FFFFFFF else value
+
+
+def to_int64(value: int) -> int:
+    """Interpret a decoded varint as a signed int64."""
+    return value - 0x10000000000000000 if value > 0x7FFFFFFFFFFFFFFF else value
+
+
+def skip_field(data: bytes, pos: int, wire_type: int, end: int) -> int:
+    """Skip the value of an unknown field ending by `end`; return the new position."""
+    match wire_type:
+        case 0:
+            return read_varint(data, pos)[1]
+        case 1:
+            pos += 8
+        case 2:
+            size, pos = read_size(data, pos, end)
+            return pos + size
+        case 5:
+            pos += 4
+        case _:
+            raise DecodeError(f"Unsupported wire type: {wire_type}")
+    if pos > end:
+        raise DecodeError("Truncated fixed-width field")
+    return pos
+
+
+def _seconds_nanos_from_wire(data: bytes, pos: int, end: int) -> tuple[int, int]:
+    seconds = nanos = 0
+    while pos < end:
+        tag, pos = read_varint(data, pos)
+        if tag == 0x08:
+            seconds, pos = read_varint(data, pos)
+            seconds = to_int64(seconds)
+        elif tag == 0x10:
+            nanos, pos = read_varint(data, pos)
+            nanos = to_int32(nanos)
+        else:
+            pos = skip_field(data, pos, tag & 7, end)
+    if pos != end:
+        raise DecodeError("Truncated message")
+    return seconds, nanos
+
+
+def timestamp_from_wire(data: bytes, pos: int, end: int) -> datetime.datetime:
+    """Decode a google.protobuf.Timestamp into a naive UTC datetime."""
+    seconds, nanos = _seconds_nanos_from_wire(data, pos, end)
+    return _EPOCH + datetime.timedelta(seconds=seconds, microseconds=nanos // 1000)
+
+
+def duration_from_wire(data: bytes, pos: int, end: int) -> datetime.timedelta:
+    """Decode a google.protobuf.Duration into a timedelta."""
+    seconds, nanos = _seconds_nanos_from_wire(data, pos, end)
+    micros = nanos // 1000 if nanos >= 0 else -(-nanos // 1000)
+    return datetime.timedelta(seconds=seconds, microseconds=micros)
+
+
+class WireParserCompiler(FunctionCompiler):
+    """
+    Compile protobuf wire bytes -> Message constructor argument parsers.
+
+    Each generated function parses one message and returns its constructor
+    arguments as a dict, filling in proto3 defaults for absent fields the same
+    way reading them from a pb2 object would. Nested Messages stay dicts for
+    Pydantic to validate, or are built with `model_construct` when
+    `trusted=True`.
+    """
+
+    kind = "parser"
+
+    def __init__(self, trusted: bool = False) -> None:
+        super().__init__()
+        self._trusted = trusted
+
+    def compile(self, message_type: Type[Message]) -> Callable:
+        self._namespace.update(
+            read_varint=read_varint,
+            read_size=read_size,
+            skip_field=skip_field,
+            DecodeError=DecodeError,
+            to_int32=to_int32,
+            unpack_float=_unpack_float,
+            timestamp_from_wire=timestamp_from_wire,
+            duration_from_wire=duration_from_wire,
+        )
+        parse = super().compile(message_type)
+
+        def deserializer(data: bytes) -> dict:
+            return parse(data, 0, len(data))
+
+        return deserializer
+
+    def _function_source(self, message_type: type, name: str) -> str:
+        numbers = proto_field_numbers(message_type)  # type: ignore
+        inits, branches, result = [], [], []
+        for i, (field_name, field_info) in enumerate(
+            message_type.model_fields.items()  # type: ignore
+        ):
+            var = f"f{i}"
+            annotation = field_info.annotation
+            if is_union_type(annotation):
+                inits.append(f"{var} = None")
+                for member_type, number in numbers[field_name]:  # type: ignore
+                    branches.extend(self._field_branches(member_type, number, var))
+                result.append(f"{field_name!r}: {var}")
+                continue
+            init, final = self._default(annotation, var)  # type: ignore
+            inits.append(init)
+            branches.extend(
+                self._field_branches(annotation, numbers[field_name], var)  # type: ignore
+            )
+            result.append(f"{field_name!r}: {final}")
+        return self._parse_function(name, inits, branches, f"{{{', '.join(result)}}}")
+
+    def _parse_function(
+        self, name: str, inits: list[str], branches: list, result: str
+    ) -> str:
+        lines = [f"def {name}(data, pos, end):", *("    " + line for line in inits)]
+        lines += [
+            "    while pos < end:",
+            "        tag = data[pos]",
+            "        if tag < 0x80:",
+            "            pos += 1",
+            "        else:",
+            "            tag, pos = read_varint(data, pos)",
+        ]
+        keyword = "if"
+        for tag, stmts in branches:
+            lines.append(f"        {keyword} tag == {tag}:")
+            lines.extend("            " + line for line in stmts)
+            keyword = "elif"
+        if branches:
+            lines.append("        else:")
+            lines.append("            pos = skip_field(data, pos, tag & 7, end)")
+        else:
+            lines.append("        pos = skip_field(data, pos, tag & 7, end)")
+        # A varint running past `end` leaves `pos` beyond it.
+        lines.append("    if pos != end:")
+        lines.append("        raise DecodeError('Truncated message')")
+        lines.append(f"    return {result}")
+        return "\n".join(lines) + "\n"
+
+    def _wire_type(self, annotation: Type) -> int:
+        if annotation in (int, bool) or is_enum_type(annotation):
+            return 0
+        if annotation is float:
+            return 5
+        return 2
+
+    def _default(self, annotation: Type, var: str) -> tuple[str, str]:
+        """Return (initialization, final expression) for a possibly absent field."""
+        origin = get_origin(annotation)
+        if origin in (list, tuple):
+            return f"{var} = []", var
+        if origin is dict:
+            return f"{var} = {{}}", var
+        if annotation in (int, str, bool, bytes, float):
+            return f"{var} = {annotation()!r}", var
+        if is_enum_type(annotation):
+            default = {m.value: m for m in annotation}.get(0, 0)
+            return f"{var} = {self._constant('default', default)}", var
+        if annotation == datetime.datetime:
+            return f"{var} = {self._constant('epoch', _EPOCH)}", var
+        if annotation == datetime.timedelta:
+            zero = self._constant("zero", datetime.timedelta(0))
+            return f"{var} = {zero}", var
+        if inspect.isclass(annotation) and issubclass(annotation, Message):
+            # An absent message field reads as an empty message, as with pb2.
+            empty = self._message_value(annotation, 'b"", 0, 0')
+            return f"{var} = None", f"{empty} if {var} is None else {var}"
+        raise TypeError(f"Type {annotation} is not supported.")
+
+    def _message_value(self, message_type: type, args: str) -> str:
+        parsed = f"{self._function_for(message_type)}({args})"
+        if self._trusted:
+            construct = self._constant("construct", message_type.model_construct)  # type: ignore
+            return f"{construct}(**{parsed})"
+        return parsed
+
+    def _read(self, annotation: Type) -> tuple[list[str], str]:
+        """Return statements reading one value at `pos` and an expression for it."""
+        if annotation in (int, bool) or is_enum_type(annotation):
+            stmts = ["value, pos = read_varint(data, pos)"]
+            if annotation is bool:
+                return stmts, "value != 0"
+            if annotation is int:
+                return stmts, "to_int32(value)"
+            table = self._constant("enum", {m.value: m for m in annotation})
+            return stmts + ["value = to_int32(value)"], f"{table}.get(value, value)"
+        if annotation is float:
+            return [
+                "if pos + 4 > end:",
+                "    raise DecodeError('Truncated fixed-width field')",
+                "value = unpack_float(data, pos)[0]",
+                "pos += 4",
+            ], "value"
+
+        if annotation is str:
+            read = "str(data[pos:pos + size], 'utf-8')"
+        elif annotation is bytes:
+            read = "data[pos:pos + size]"
+        elif annotation == datetime.datetime:
+            read = "timestamp_from_wire(data, pos, pos + size)"
+        elif annotation == datetime.timedelta:
+            read = "duration_from_wire(data, pos, pos + size)"
+        elif inspect.isclass(annotation) and issubclass(annotation, Message):
+            read = self._message_value(annotation, "data, pos, pos + size")
+        else:
+            raise TypeError(f"Type {annotation} is not supported.")
+        return [
+            "size, pos = read_size(data, pos, end)",
+            f"value = {read}",
+            "pos += size",
+        ], "value"
+
+    def _field_branches(
+        self, annotation: Type, number: int, var: str
+    ) -> list[tuple[int, list[str]]]:
+        """Return (tag, statements) pairs parsing field `number` into `var`."""
+        origin = get_origin(annotation)
+        if origin in (list, tuple):
+            item_type = get_args(annotation)[0]
+            stmts, expr = self._read(item_type)
+            append = [*stmts, f"{var}.append({expr})"]
+            wire_type = self._wire_type(item_type)
+            branches = [(number << 3 | wire_type, append)]
+            if wire_type != 2:
+                # Repeated scalars may arrive packed or unpacked.
+                packed = [
+                    "size, pos = read_size(data, pos, end)",
+                    "stop = pos + size",
+                    "while pos < stop:",
+                    *("    " + line for line in append),
+                    "if pos != stop:",
+                    "    raise DecodeError('Truncated packed field')",
+                ]
+                branches.append((number << 3 | 2, packed))
+            return branches
 
-    # If Message
-    if inspect.isclass(field_type) and issubclass(field_type, Message):
-        return convert_python_message_to_proto(value, field_type, pb2_module)
+        if origin is dict:
+            entry = self._map_entry_parser(*get_args(annotation))
+            stmts = [
+                "size, pos = read_size(data, pos, end)",
+                f"key, value = {entry}(data, pos, pos + size)",
+                "pos += size",
+                f"{var}[key] = value",
+            ]
+            return [(number << 3 | 2, stmts)]
+
+        stmts, expr = self._read(annotation)
+        tag = number << 3 | self._wire_type(annotation)
+        return [(tag, [*stmts, f"{var} = {expr}"])]
+
+    def _map_entry_parser(self, key_type: Type, value_type: Type) -> str:
+        name = self._name("entry_")
+        key_init, key_final = self._default(key_type, "k")
+        value_init, value_final = self._default(value_type, "v")
+        branches = self._field_branches(key_type, 1, "k")
+        branches += self._field_branches(value_type, 2, "v")
+        self._helpers.append(
+            self._parse_function(
+                name, [key_init, value_init], branches, f"{key_final}, {value_final}"
+            )
+        )
+        return name
 
-    # If primitive
-    return value
+
+# Wire parsers keyed by (Message class, trusted).
+_wire_deserializers: dict[tuple[type, bool], Callable] = {}
+
+
+def get_wire_deserializer(arg_type: Type[Message], trusted: bool = False) -> Callable:
+    """Return the compiled protobuf bytes -> constructor arguments parser."""
+    key = (arg_type, trusted)
+    deserializer = _wire_deserializers.get(key)
+    if deserializer is None:
+        deserializer = _wire_deserializers.setdefault(
+            key, WireParserCompiler(trusted).compile(arg_type)
+        )
+    return deserializer
 
 
 ###############################################################################
-# 3. Generating proto files (datetime->Timestamp, timedelta->Duration)
+# 5. Generating proto files (datetime->Timestamp, timedelta->Duration)
 ###############################################################################
 
 
@@ -690,6 +2791,25 @@ def generate_enum_definition(enum_type: Type[enum.Enum]) -> str:
     return enum_def
 
 
+def oneof_member_typename(arg_type: Type) -> str:
+    """Return the protobuf type name of one member of a union (oneof) field."""
+    proto_typename = protobuf_type_mapping(arg_type)
+    if proto_typename is None:
+        raise Exception(f"Nested Union not flattened properly: {arg_type}")
+
+    # If it's an enum or Message, use the type name.
+    if is_enum_type(arg_type):
+        return arg_type.__name__
+    if inspect.isclass(arg_type) and issubclass(arg_type, Message):
+        return arg_type.__name__
+    return proto_typename  # type: ignore
+
+
+def oneof_member_name(field_name: str, arg_type: Type) -> str:
+    """Return the protobuf field name generated for one member of a oneof."""
+    return f"{field_name}_{oneof_member_typename(arg_type).replace('.', '_')}"
+
+
 def generate_oneof_definition(
     field_name: str, union_args: list[Type], start_index: int
 ) -> tuple[list[str], int]:
@@ -701,23 +2821,35 @@ def generate_oneof_definition(
     lines.append(f"oneof {field_name} {{")
     current = start_index
     for arg_type in union_args:
-        proto_typename = protobuf_type_mapping(arg_type)
-        if proto_typename is None:
-            raise Exception(f"Nested Union not flattened properly: {arg_type}")
-
-        # If it's an enum or Message, use the type name.
-        if is_enum_type(arg_type):
-            proto_typename = arg_type.__name__
-        elif inspect.isclass(arg_type) and issubclass(arg_type, Message):
-            proto_typename = arg_type.__name__
-
-        field_alias = f"{field_name}_{proto_typename.replace('.', '_')}"
+        proto_typename = oneof_member_typename(arg_type)
+        field_alias = oneof_member_name(field_name, arg_type)
         lines.append(f"  {proto_typename} {field_alias} = {current};")
         current += 1
     lines.append("}")
     return lines, current
 
 
+def proto_field_numbers(
+    message_type: Type[Message],
+) -> dict[str, int | list[tuple[Type, int]]]:
+    """
+    Return the protobuf field numbers of a Message class. Fields are numbered
+    in declaration order; a union field maps to a list of (member type,
+    number) pairs because every oneof member takes a number of its own.
+    """
+    numbers = {}
+    index = 1
+    for field_name, field_info in message_type.model_fields.items():
+        if is_union_type(field_info.annotation):  # type: ignore
+            members = flatten_union(field_info.annotation)  # type: ignore
+            numbers[field_name] = [(t, index + i) for i, t in enumerate(members)]
+            index += len(members)
+        else:
+            numbers[field_name] = index
+            index += 1
+    return numbers  # type: ignore
+
+
 def generate_message_definition(
     message_type: Type[Message],
     done_enums: set,
@@ -730,7 +2862,7 @@ def generate_message_definition(
     fields = []
     refs = []
     pydantic_fields = message_type.model_fields
-    index = 1
+    numbers = proto_field_numbers(message_type)
 
     for field_name, field_info in pydantic_fields.items():
         field_type = field_info.annotation
@@ -739,11 +2871,10 @@ def generate_message_definition(
 
         if is_union_type(field_type):
             union_args = flatten_union(field_type)
-            oneof_lines, new_index = generate_oneof_definition(
-                field_name, union_args, index
+            oneof_lines, _ = generate_oneof_definition(
+                field_name, union_args, numbers[field_name][0][1]
             )
             fields.extend(oneof_lines)
-            index = new_index
 
             for utype in union_args:
                 if is_enum_type(utype) and utype not in done_enums:
@@ -804,15 +2935,14 @@ def generate_message_definition(
                         case _:
                             fields.append("//   " + str(metadata_item))
 
-            fields.append(f"{proto_typename} {field_name} = {index};")
-            index += 1
+            fields.append(f"{proto_typename} {field_name} = {numbers[field_name]};")
 
     msg_def = f"message {message_type.__name__} {{\n{indent_lines(fields)}\n}}"
     return msg_def, refs
 
 
 def is_stream_type(annotation: Type) -> bool:
-    return get_origin(annotation) is AsyncIterator
+    return get_origin(annotation) in (AsyncIterator, Iterator, Generator)
 
 
 def is_generic_alias(annotation: Type) -> bool:
@@ -898,22 +3028,21 @@ def generate_proto(obj: object, package_name: str = "") -> str:
             for comment_line in comment_out(method_docstr):
                 rpc_definitions.append(comment_line)
 
+        request_name = request_type.__name__
+        if is_client_stream(method_sig):
+            request_name = f"stream {request_name}"
         if is_stream_type(response_type):
             item_type = get_args(response_type)[0]
             rpc_definitions.append(
-                f"rpc {method_name} ({request_type.__name__}) returns (stream {item_type.__name__});"
+                f"rpc {method_name} ({request_name}) returns (stream {item_type.__name__});"
             )
         else:
             rpc_definitions.append(
-                f"rpc {method_name} ({request_type.__name__}) returns ({response_type.__name__});"
+                f"rpc {method_name} ({request_name}) returns ({response_type.__name__});"
             )
 
     if not package_name:
-        if service_name.endswith("Service"):
-            package_name = service_name[: -len("Service")]
-        else:
-            package_name = service_name
-        package_name = package_name.lower() + ".v1"
+        package_name = default_package_name(service_name)
 
     imports = []
     if uses_timestamp:
@@ -939,6 +3068,221 @@ service {service_name} {{
     return proto_definition
 
 
+_SCALAR_FIELD_TYPES = {
+    int: descriptor_pb2.FieldDescriptorProto.TYPE_INT32,
+    str: descriptor_pb2.FieldDescriptorProto.TYPE_STRING,
+    bool: descriptor_pb2.FieldDescriptorProto.TYPE_BOOL,
+    bytes: descriptor_pb2.FieldDescriptorProto.TYPE_BYTES,
+    float: descriptor_pb2.FieldDescriptorProto.TYPE_FLOAT,
+}
+
+_WELL_KNOWN_TYPES = {
+    datetime.datetime: (".google.protobuf.Timestamp", timestamp_pb2),
+    datetime.timedelta: (".google.protobuf.Duration", duration_pb2),
+}
+
+
+def is_in_memory_codegen() -> bool:
+    """Check if protobuf modules should be built in memory instead of by protoc."""
+    return os.getenv("PYDANTIC_RPC_CODEGEN", "protoc").lower() == "memory"
+
+
+def default_package_name(service_name: str) -> str:
+    """Return the proto package used when none is given, e.g. greeter.v1."""
+    if service_name.endswith("Service"):
+        service_name = service_name[: -len("Service")]
+    return service_name.lower() + ".v1"
+
+
+class FileDescriptorBuilder:
+    """
+    Build a FileDescriptorProto for a service object, equivalent to compiling
+    the output of `generate_proto` with protoc.
+    """
+
+    def __init__(self, obj: object, package_name: str = "") -> None:
+        service_name = obj.__class__.__name__
+        self._obj = obj
+        self._package = package_name or default_package_name(service_name)
+        self._file = descriptor_pb2.FileDescriptorProto(
+            name=service_name.lower() + ".proto",
+            package=self._package,
+            syntax="proto3",
+        )
+        self._done: set[type] = set()
+        self._pending: list[type] = []
+
+    def build(self) -> descriptor_pb2.FileDescriptorProto:
+        service = self._file.service.add(name=self._obj.__class__.__name__)
+        for method_name, method in get_rpc_methods(self._obj):
+            if method.__name__.startswith("_"):
+                continue
+            sig = inspect.signature(method)
+            request_type = get_request_arg_type(sig)
+            response_type = sig.return_annotation
+            server_streaming = is_stream_type(response_type)
+            if server_streaming:
+                response_type = get_args(response_type)[0]
+            method_proto = service.method.add(
+                name=method_name,
+                input_type=self._type_name(request_type),
+                output_type=self._type_name(response_type),
+            )
+            if is_client_stream(sig):
+                method_proto.client_streaming = True
+            if server_streaming:
+                method_proto.server_streaming = True
+        while self._pending:
+            t = self._pending.pop(0)
+            if is_enum_type(t):
+                self._add_enum(t)
+            else:
+                self._add_message(t)
+        return self._file
+
+    def _type_name(self, t: type) -> str:
+        if t not in self._done:
+            self._done.add(t)
+            self._pending.append(t)
+        return f".{self._package}.{t.__name__}"
+
+    def _add_enum(self, enum_type: Type[enum.Enum]) -> None:
+        enum_proto = self._file.enum_type.add(name=enum_type.__name__)
+        for member in enum_type.__members__.values():
+            enum_proto.value.add(name=member.name, number=member.value)
+
+    def _add_message(self, message_type: Type[Message]) -> None:
+        message_proto = self._file.message_type.add(name=message_type.__name__)
+        numbers = proto_field_numbers(message_type)
+        for field_name, field_info in message_type.model_fields.items():
+            annotation = field_info.annotation
+            if is_union_type(annotation):
+                oneof_index = len(message_proto.oneof_decl)
+                message_proto.oneof_decl.add(name=field_name)
+                for member_type, number in numbers[field_name]:  # type: ignore
+                    field = message_proto.field.add(
+                        name=oneof_member_name(field_name, member_type),
+                        number=number,
+                        oneof_index=oneof_index,
+                    )
+                    self._set_type(field, member_type)
+                continue
+
+            field = message_proto.field.add(name=field_name, number=numbers[field_name])  # type: ignore
+            origin = get_origin(annotation)
+            if origin in (list, tuple):
+                field.label = field.LABEL_REPEATED
+                self._set_type(field, get_args(annotation)[0])
+            elif origin is dict:
+                # As protoc names map entries: capitalize each part, keep the rest.
+                entry_name = (
+                    "".join(p[:1].upper() + p[1:] for p in field_name.split("_"))
+                    + "Entry"
+                )
+                entry = message_proto.nested_type.add(name=entry_name)
+                entry.options.map_entry = True
+                key_type, value_type = get_args(annotation)
+                self._set_type(entry.field.add(name="key", number=1), key_type)
+                self._set_type(entry.field.add(name="value", number=2), value_type)
+                field.label = field.LABEL_REPEATED
+                field.type = field.TYPE_MESSAGE
+                field.type_name = (
+                    f".{self._package}.{message_type.__name__}.{entry_name}"
+                )
+            else:
+                self._set_type(field, annotation)  # type: ignore
+
+    def _set_type(self, field: descriptor_pb2.FieldDescriptorProto, t: Type) -> None:
+        if not field.HasField("label"):
+            field.label = field.LABEL_OPTIONAL
+        if t in _SCALAR_FIELD_TYPES:
+            field.type = _SCALAR_FIELD_TYPES[t]
+        elif t in _WELL_KNOWN_TYPES:
+            type_name, pb2_module = _WELL_KNOWN_TYPES[t]
+            field.type = field.TYPE_MESSAGE
+            field.type_name = type_name
+            if pb2_module.DESCRIPTOR.name not in self._file.dependency:
+                self._file.dependency.append(pb2_module.DESCRIPTOR.name)
+        elif is_enum_type(t):
+            field.type = field.TYPE_ENUM
+            field.type_name = self._type_name(t)
+        elif inspect.isclass(t) and issubclass(t, Message):
+            field.type = field.TYPE_MESSAGE
+            field.type_name = self._type_name(t)
+        else:
+            raise Exception(f"Type {t} is not supported.")
+
+
+def build_proto_modules_in_memory(obj: object, package_name: str = ""):
+    """
+    Build the service's descriptors without protoc, register them in the
+    default descriptor pool, and return synthetic (pb2_grpc, pb2) modules.
+
+    The pb2 module exposes DESCRIPTOR, the message classes and the enums; the
+    pb2_grpc module exposes the Servicer base class and a client Stub. Having
+    no add_*_to_server function, servicers are registered with generic
+    handlers (see `add_servicer_to_server`).
+    """
+    file_proto = FileDescriptorBuilder(obj, package_name).build()
+    serialized = file_proto.SerializeToString()
+    pool = descriptor_pool.Default()
+    try:
+        file_desc = pool.FindFileByName(file_proto.name)
+    except KeyError:
+        pool.AddSerializedFile(serialized)
+        file_desc = pool.FindFileByName(file_proto.name)
+    else:
+        if file_desc.serialized_pb != serialized:
+            raise Exception(
+                f"{file_proto.name} is already registered with another schema"
+            )
+
+    base = os.path.splitext(file_proto.name)[0]
+    pb2_module = types.ModuleType(f"{base}_pb2")
+    pb2_module.DESCRIPTOR = file_desc  # type: ignore
+    for name, message_desc in file_desc.message_types_by_name.items():
+        setattr(pb2_module, name, message_factory.GetMessageClass(message_desc))
+    for name, enum_desc in file_desc.enum_types_by_name.items():
+        setattr(pb2_module, name, enum_type_wrapper.EnumTypeWrapper(enum_desc))
+
+    pb2_grpc_module = types.ModuleType(f"{base}_pb2_grpc")
+    for service_desc in file_desc.services_by_name.values():
+        servicer = type(f"{service_desc.name}Servicer", (object,), {})
+        setattr(pb2_grpc_module, servicer.__name__, servicer)
+        stub = make_stub_class(service_desc, pb2_module)
+        setattr(pb2_grpc_module, stub.__name__, stub)
+    return pb2_grpc_module, pb2_module
+
+
+def make_stub_class(service_desc, pb2_module) -> type:
+    """Create a gRPC client stub class for a service descriptor."""
+
+    def __init__(self, channel):
+        for method_desc in service_desc.methods:
+            match (method_desc.client_streaming, method_desc.server_streaming):
+                case (False, False):
+                    factory = channel.unary_unary
+                case (False, True):
+                    factory = channel.unary_stream
+                case (True, False):
+                    factory = channel.stream_unary
+                case _:
+                    factory = channel.stream_stream
+            request_class = getattr(pb2_module, method_desc.input_type.name)
+            response_class = getattr(pb2_module, method_desc.output_type.name)
+            setattr(
+                self,
+                method_desc.name,
+                factory(
+                    f"/{service_desc.full_name}/{method_desc.name}",
+                    request_serializer=request_class.SerializeToString,
+                    response_deserializer=response_class.FromString,
+                ),
+            )
+
+    return type(f"{service_desc.name}Stub", (object,), {"__init__": __init__})
+
+
 def generate_grpc_code(proto_file, grpc_python_out) -> types.ModuleType | None:
     """
     Execute the protoc command to generate Python gRPC code from the .proto file.
@@ -1031,11 +3375,33 @@ def generate_pb_code(
 
 
 def get_request_arg_type(sig):
-    """Return the type annotation of the first parameter (request) of a method."""
+    """
+    Return the request Message type of a method: the annotation of its first
+    parameter, or the item type of an `AsyncIterator[...]` request stream.
+    """
     num_of_params = len(sig.parameters)
     if not (num_of_params == 1 or num_of_params == 2):
         raise Exception("Method must have exactly one or two parameters")
-    return tuple(sig.parameters.values())[0].annotation
+    annotation = tuple(sig.parameters.values())[0].annotation
+    if is_stream_type(annotation):
+        annotation = get_args(annotation)[0]
+        if get_origin(annotation) is list:
+            return get_args(annotation)[0]
+    return annotation
+
+
+def is_client_stream(sig) -> bool:
+    """Whether a method receives its requests as a stream."""
+    params = tuple(sig.parameters.values())
+    return bool(params) and is_stream_type(params[0].annotation)
+
+
+def is_batched_stream(sig) -> bool:
+    """Whether a method receives its request stream in batches (lists)."""
+    if not is_client_stream(sig):
+        return False
+    item_type = get_args(tuple(sig.parameters.values())[0].annotation)[0]
+    return get_origin(item_type) is list
 
 
 def get_rpc_methods(obj: object) -> list[tuple[str, types.MethodType]]:
@@ -1059,6 +3425,118 @@ def is_skip_generation() -> bool:
     return os.getenv("PYDANTIC_RPC_SKIP_GENERATION", "false").lower() == "true"
 
 
+def is_codegen_cache_enabled() -> bool:
+    """Check if generated code should be cached outside the working directory."""
+    return os.getenv("PYDANTIC_RPC_CODEGEN_CACHE", "false").lower() == "true"
+
+
+def get_codegen_cache_dir() -> str:
+    """
+    Return the code-generation cache directory: $PYDANTIC_RPC_CACHE_DIR if set,
+    otherwise pydantic-rpc under $XDG_CACHE_HOME (default ~/.cache).
+    """
+    cache_dir = os.getenv("PYDANTIC_RPC_CACHE_DIR")
+    if cache_dir:
+        return cache_dir
+    cache_home = os.getenv("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home, "pydantic-rpc")
+
+
+def get_codegen_cache_entry(proto_text: str, plugin: str) -> str:
+    """Return the cache directory for a proto file, keyed by a hash of its inputs."""
+    digest = hashlib.sha256()
+    for part in (proto_text, plugin, importlib.metadata.version("grpcio-tools")):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return os.path.join(get_codegen_cache_dir(), digest.hexdigest()[:32])
+
+
+@contextlib.contextmanager
+def _file_lock(path: str):
+    """Hold an exclusive lock on `path` (a no-op where fcntl is unavailable)."""
+    with open(path, "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def load_module(name: str, path: str) -> types.ModuleType:
+    """Execute the module at `path` and register it in sys.modules as `name`."""
+    spec = importlib.util.spec_from_file_location(name, path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load {name} from {path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def compile_proto_cached(
+    proto_file_name: str, proto_text: str, plugin: str
+) -> tuple[types.ModuleType, types.ModuleType] | None:
+    """
+    Compile a proto file into the code-generation cache and load its modules.
+    `plugin` is "grpc" or "connecpy". Returns (plugin_module, pb2_module), or
+    None if protoc failed.
+
+    protoc only runs when no entry exists for the proto text and grpcio-tools
+    version. Concurrent processes serialize on a lock file, and entries appear
+    atomically, so readers never see partial output.
+    """
+    entry = get_codegen_cache_entry(proto_text, plugin)
+    if not os.path.isdir(entry):
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        with _file_lock(entry + ".lock"):
+            if not os.path.isdir(entry) and not _populate_cache_entry(
+                entry, proto_file_name, proto_text, plugin
+            ):
+                return None
+
+    if entry not in sys.path:
+        sys.path.append(entry)
+    base = os.path.splitext(proto_file_name)[0]
+    suffix = "_pb2_grpc" if plugin == "grpc" else "_connecpy"
+    pb2_module = load_module(f"{base}_pb2", os.path.join(entry, f"{base}_pb2.py"))
+    plugin_module = load_module(
+        base + suffix, os.path.join(entry, base + suffix + ".py")
+    )
+    return plugin_module, pb2_module
+
+
+def _populate_cache_entry(
+    entry: str, proto_file_name: str, proto_text: str, plugin: str
+) -> bool:
+    tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=os.path.dirname(entry))
+    try:
+        with open(os.path.join(tmp_dir, proto_file_name), "w", encoding="utf-8") as f:
+            f.write(proto_text)
+        plugin_out = "grpc_python_out" if plugin == "grpc" else "connecpy_out"
+        well_known_protos = importlib.resources.files("grpc_tools") / "_proto"
+        exit_code = protoc.main(
+            [
+                "grpc_tools.protoc",
+                f"-I{tmp_dir}",
+                f"-I{well_known_protos}",
+                f"--python_out={tmp_dir}",
+                f"--pyi_out={tmp_dir}",
+                f"--{plugin_out}={tmp_dir}",
+                os.path.join(tmp_dir, proto_file_name),
+            ]
+        )
+        if exit_code != 0:
+            return False
+        os.replace(tmp_dir, entry)
+        return True
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
 def generate_and_compile_proto(obj: object, package_name: str = ""):
     if is_skip_generation():
         import importlib
@@ -1073,10 +3551,19 @@ def generate_and_compile_proto(obj: object, package_name: str = ""):
 
         # If the modules are not found, generate and compile the proto files.
 
+    if is_in_memory_codegen():
+        return build_proto_modules_in_memory(obj, package_name)
+
     klass = obj.__class__
     proto_file = generate_proto(obj, package_name)
     proto_file_name = klass.__name__.lower() + ".proto"
 
+    if is_codegen_cache_enabled():
+        cached = compile_proto_cached(proto_file_name, proto_file, "grpc")
+        if cached is None:
+            raise Exception("Generating grpc code")
+        return cached
+
     with open(proto_file_name, "w", encoding="utf-8") as f:
         f.write(proto_file)
 
@@ -1108,6 +3595,12 @@ def generate_and_compile_proto_using_connecpy(obj: object, package_name: str = "
     proto_file = generate_proto(obj, package_name)
     proto_file_name = klass.__name__.lower() + ".proto"
 
+    if is_codegen_cache_enabled():
+        cached = compile_proto_cached(proto_file_name, proto_file, "connecpy")
+        if cached is None:
+            raise Exception("Generating Connecpy code")
+        return cached
+
     with open(proto_file_name, "w", encoding="utf-8") as f:
         f.write(proto_file)
 
@@ -1122,20 +3615,761 @@ def generate_and_compile_proto_using_connecpy(obj: object, package_name: str = "
 
 
 ###############################################################################
-# 4. Server Implementations
+# 6. Server Implementations
 ###############################################################################
 
 
+def build_rpc_method_handlers(
+    obj: object,
+    servicer,
+    pb2_module,
+    wire_serialization: bool = False,
+    validation=None,
+    wire_deserialization: bool = False,
+) -> dict[str, grpc.RpcMethodHandler]:
+    """
+    Build gRPC method handlers for a servicer from the pb2 service descriptor.
+    With wire serialization, responses are serialized straight from Messages;
+    with wire deserialization, requests are parsed straight from bytes.
+    """
+    service = pb2_module.DESCRIPTOR.services_by_name[obj.__class__.__name__]
+    methods = dict(get_rpc_methods(obj))
+    handlers = {}
+    for method_desc in service.methods:
+        method = methods[method_desc.name]
+        request_class = getattr(pb2_module, method_desc.input_type.name)
+        deserializer = get_request_deserializer(
+            method,
+            get_request_arg_type(inspect.signature(method)),
+            request_class,
+            validation,
+            wire_deserialization,
+        )
+        if wire_serialization:
+            response_type = inspect.signature(method).return_annotation
+            if is_stream_type(response_type):
+                response_type = get_args(response_type)[0]
+            serializer = get_wire_serializer(response_type)
+            if get_method_option(method, "compression") is not None:
+                # The stub has already serialized the response.
+                serializer = None
+        else:
+            serializer = getattr(
+                pb2_module, method_desc.output_type.name
+            ).SerializeToString
+
+        match (method_desc.client_streaming, method_desc.server_streaming):
+            case (False, False):
+                handler_factory = grpc.unary_unary_rpc_method_handler
+            case (False, True):
+                handler_factory = grpc.unary_stream_rpc_method_handler
+            case (True, False):
+                handler_factory = grpc.stream_unary_rpc_method_handler
+            case _:
+                handler_factory = grpc.stream_stream_rpc_method_handler
+
+        handlers[method_desc.name] = handler_factory(
+            getattr(servicer, method_desc.name),
+            request_deserializer=deserializer,
+            response_serializer=serializer,
+        )
+    return handlers
+
+
+def add_servicer_to_server(
+    pb2_grpc_module,
+    pb2_module,
+    obj: object,
+    servicer,
+    server,
+    wire_serialization: bool = False,
+    validation=None,
+    wire_deserialization: bool = False,
+):
+    """Register a servicer with a gRPC (or Sonora) server."""
+    service_name = obj.__class__.__name__
+    add_to_server = getattr(
+        pb2_grpc_module, f"add_{service_name}Servicer_to_server", None
+    )
+    if add_to_server is not None and not (wire_serialization or wire_deserialization):
+        add_to_server(servicer, server)
+        return
+
+    full_service_name = pb2_module.DESCRIPTOR.services_by_name[service_name].full_name
+    handlers = build_rpc_method_handlers(
+        obj,
+        servicer,
+        pb2_module,
+        wire_serialization,
+        validation,
+        wire_deserialization,
+    )
+    server.add_generic_rpc_handlers(
+        (grpc.method_handlers_generic_handler(full_service_name, handlers),)
+    )
+    if hasattr(server, "add_registered_method_handlers"):
+        server.add_registered_method_handlers(full_service_name, handlers)
+
+
+class ServerOptions(BaseModel):
+    """
+    Typed gRPC server settings, passed to `Server` and `AsyncIOServer` as
+    `options`. Fields left as None keep gRPC's defaults; `extra` adds raw
+    channel args by name.
+
+    Presets (see `preset`):
+        "low-latency": aggressive keepalive to notice dead peers quickly, and
+            a bounded connection age so load balancers can rebalance.
+        "bulk-transfer": 64 MiB messages, BDP probing and large HTTP/2
+            windows and frames for high bandwidth-delay links.
+    """
+
+    model_config = ConfigDict(extra="forbid")
+
+    max_receive_message_length: int | None = None
+    max_send_message_length: int | None = None
+    max_concurrent_streams: int | None = None
+    keepalive_time_ms: int | None = None
+    keepalive_timeout_ms: int | None = None
+    keepalive_permit_without_calls: bool | None = None
+    http2_max_pings_without_data: int | None = None
+    http2_min_ping_interval_without_data_ms: int | None = None
+    http2_bdp_probe: bool | None = None
+    http2_stream_window_size: int | None = None
+    http2_max_frame_size: int | None = None
+    http2_write_buffer_size: int | None = None
+    max_connection_idle_ms: int | None = None
+    max_connection_age_ms: int | None = None
+    max_connection_age_grace_ms: int | None = None
+    compression: Literal["none", "gzip", "deflate"] | None = None
+    extra: dict[str, int | str] = {}
+
+    CHANNEL_ARGS: ClassVar[dict[str, str]] = {
+        "max_receive_message_length": "grpc.max_receive_message_length",
+        "max_send_message_length": "grpc.max_send_message_length",
+        "max_concurrent_streams": "grpc.max_concurrent_streams",
+        "keepalive_time_ms": "grpc.keepalive_time_ms",
+        "keepalive_timeout_ms": "grpc.keepalive_timeout_ms",
+        "keepalive_permit_without_calls": "grpc.keepalive_permit_without_calls",
+        "http2_max_pings_without_data": "grpc.http2.max_pings_without_data",
+        "http2_min_ping_interval_without_data_ms": (
+            "grpc.http2.min_ping_interval_without_data_ms"
+        ),
+        "http2_bdp_probe": "grpc.http2.bdp_probe",
+        "http2_stream_window_size": "grpc.http2.lookahead_bytes",
+        "http2_max_frame_size": "grpc.http2.max_frame_size",
+        "http2_write_buffer_size": "grpc.http2.write_buffer_size",
+        "max_connection_idle_ms": "grpc.max_connection_idle_ms",
+        "max_connection_age_ms": "grpc.max_connection_age_ms",
+        "max_connection_age_grace_ms": "grpc.max_connection_age_grace_ms",
+    }
+
+    PRESETS: ClassVar[dict[str, dict]] = {
+        "low-latency": {
+            "keepalive_time_ms": 10_000,
+            "keepalive_timeout_ms": 5_000,
+            "keepalive_permit_without_calls": True,
+            "http2_max_pings_without_data": 0,
+            "http2_min_ping_interval_without_data_ms": 5_000,
+            "max_connection_age_ms": 300_000,
+            "max_connection_age_grace_ms": 30_000,
+        },
+        "bulk-transfer": {
+            "max_receive_message_length": 64 * 1024 * 1024,
+            "max_send_message_length": 64 * 1024 * 1024,
+            "http2_bdp_probe": True,
+            "http2_stream_window_size": 16 * 1024 * 1024,
+            "http2_max_frame_size": 16 * 1024 * 1024 - 1,
+            "http2_write_buffer_size": 1024 * 1024,
+        },
+    }
+
+    @classmethod
+    def preset(cls, name: str, **overrides) -> "ServerOptions":
+        """Return the named preset, with any fields replaced by `overrides`."""
+        if name not in cls.PRESETS:
+            raise ValueError(f"Unknown server options preset: {name!r}")
+        return cls(**{**cls.PRESETS[name], **overrides})
+
+    @classmethod
+    def resolve(cls, options: "ServerOptions | str | None") -> "ServerOptions":
+        """Accept a ServerOptions, a preset name or None (gRPC defaults)."""
+        if options is None:
+            return cls()
+        if isinstance(options, str):
+            return cls.preset(options)
+        return options
+
+    def channel_args(self) -> list[tuple[str, int | str]]:
+        """Return the options as gRPC channel args."""
+        args = []
+        for field, key in self.CHANNEL_ARGS.items():
+            value = getattr(self, field)
+            if value is not None:
+                args.append((key, int(value)))
+        args.extend(self.extra.items())
+        return args
+
+    def grpc_compression(self) -> grpc.Compression | None:
+        """Return the server-wide default compression, if any."""
+        if self.compression is None:
+            return None
+        return COMPRESSION_ALGORITHMS[self.compression]
+
+
+class RequestLimitInterceptor(grpc.ServerInterceptor):
+    """Call `on_limit` once, when the `limit`-th RPC arrives."""
+
+    def __init__(self, limit: int, on_limit: Callable[[], None]) -> None:
+        self._counter = itertools.count(1)
+        self._limit = limit
+        self._on_limit = on_limit
+
+    def _count(self) -> None:
+        if next(self._counter) == self._limit:
+            self._on_limit()
+
+    def intercept_service(self, continuation, handler_call_details):
+        self._count()
+        return continuation(handler_call_details)
+
+
+class AsyncRequestLimitInterceptor(RequestLimitInterceptor, grpc.aio.ServerInterceptor):
+    """RequestLimitInterceptor for grpc.aio servers."""
+
+    async def intercept_service(self, continuation, handler_call_details):
+        self._count()
+        return await continuation(handler_call_details)
+
+
+class ExpiredDeadlineInterceptor(grpc.ServerInterceptor):
+    """
+    Fail RPCs with DEADLINE_EXCEEDED, without running them, when their
+    deadline expired while they waited for a worker thread.
+    """
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+        for kind in ("unary_unary", "unary_stream", "stream_unary", "stream_stream"):
+            behavior = getattr(handler, kind)
+            if behavior is not None:
+                return handler._replace(**{kind: self._wrap(behavior)})
+        return handler
+
+    @staticmethod
+    def _wrap(behavior: Callable) -> Callable:
+        def check_deadline(request, context):
+            remaining = context.time_remaining()
+            if remaining is not None and remaining <= 0:
+                context.abort(
+                    grpc.StatusCode.DEADLINE_EXCEEDED,
+                    "Deadline expired before the call started",
+                )
+            return behavior(request, context)
+
+        return check_deadline
+
+
+class ConcurrencyLimitInterceptor(grpc.ServerInterceptor):
+    """
+    Admit unary RPCs against the AdaptiveLimiter of their method, stored in
+    `limiters` by full method name. gRPC calls interceptors as RPCs arrive,
+    before they wait for a worker thread, so time spent queued counts towards
+    a call's latency and queued calls count as in flight.
+    """
+
+    def __init__(self) -> None:
+        self.limiters: dict[str, AdaptiveLimiter] = {}
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        limiter = self.limiters.get(handler_call_details.method)
+        if limiter is None or handler is None or handler.unary_unary is None:
+            return handler
+        if not limiter.try_acquire():
+            return handler._replace(unary_unary=self._reject)
+        return handler._replace(
+            unary_unary=self._wrap(handler.unary_unary, limiter, time.perf_counter())
+        )
+
+    @staticmethod
+    def _reject(request, context):
+        context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, "Concurrency limit exceeded")
+
+    @staticmethod
+    def _wrap(behavior: Callable, limiter: AdaptiveLimiter, start: float) -> Callable:
+        def limited(request, context):
+            release_unrun.detach()
+            try:
+                response = behavior(request, context)
+            except BaseException:
+                limiter.release(None)
+                raise
+            limiter.release(time.perf_counter() - start)
+            return response
+
+        # gRPC skips the behavior of a call cancelled while queued, or whose
+        # request can't be decoded; its slot is returned, without a latency
+        # sample, once the handler is dropped.
+        release_unrun = weakref.finalize(limited, limiter.release, None)
+        return limited
+
+
+class InFlightInterceptor(grpc.ServerInterceptor):
+    """
+    Count the application RPCs in progress, so a shutdown can report how many
+    it cut off. Health checks and reflection are not counted.
+    """
+
+    UNTRACKED = ("/grpc.health.", "/grpc.reflection.")
+
+    def __init__(self) -> None:
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def _enter(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def _exit(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def _track(self, handler, handler_call_details):
+        if handler is None or handler_call_details.method.startswith(self.UNTRACKED):
+            return handler
+        for kind in ("unary_unary", "unary_stream", "stream_unary", "stream_stream"):
+            behavior = getattr(handler, kind)
+            if behavior is not None:
+                tracked = self._wrap(behavior, handler.response_streaming)
+                return handler._replace(**{kind: tracked})
+        return handler
+
+    def intercept_service(self, continuation, handler_call_details):
+        return self._track(continuation(handler_call_details), handler_call_details)
+
+    def _wrap(self, behavior: Callable, response_streaming: bool) -> Callable:
+        if response_streaming:
+
+            def track_stream(request, context):
+                self._enter()
+                try:
+                    yield from behavior(request, context)
+                finally:
+                    self._exit()
+
+            return track_stream
+
+        def track(request, context):
+            self._enter()
+            try:
+                return behavior(request, context)
+            finally:
+                self._exit()
+
+        return track
+
+
+class AsyncInFlightInterceptor(InFlightInterceptor, grpc.aio.ServerInterceptor):
+    """InFlightInterceptor for grpc.aio servers."""
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        return self._track(handler, handler_call_details)
+
+    def _wrap(self, behavior: Callable, response_streaming: bool) -> Callable:
+        if inspect.isasyncgenfunction(behavior):
+
+            async def track_stream(request, context):
+                self._enter()
+                try:
+                    async for response in behavior(request, context):
+                        yield response
+                finally:
+                    self._exit()
+
+            return track_stream
+
+        if inspect.iscoroutinefunction(behavior):
+
+            async def track(request, context):
+                self._enter()
+                try:
+                    return await behavior(request, context)
+                finally:
+                    self._exit()
+
+            return track
+
+        return behavior
+
+
+def executor_queue_depth(executor) -> int:
+    """
+    Return the number of calls waiting in a ThreadPoolExecutor, or 0 for other
+    executors. The queue is private, so 0 is also returned if it is missing.
+    """
+    work_queue = getattr(executor, "_work_queue", None)
+    if work_queue is None:
+        return 0
+    return work_queue.qsize()
+
+
+def _count_cut_off(in_flight: InFlightInterceptor | None) -> int | None:
+    """Report the RPCs still running after a shutdown grace period."""
+    if in_flight is None:
+        print("Cut off in-flight RPCs after the shutdown grace period.")
+        return None
+    cut = in_flight.in_flight
+    if cut:
+        print(f"Cut off {cut} in-flight RPCs after the shutdown grace period.")
+    return cut
+
+
+class LoadAwareHealth:
+    """
+    Reports a server's services as degraded while it is saturated, so health
+    checking clients and load balancers steer traffic elsewhere.
+
+    Every `interval` seconds the server samples its in-flight RPCs, the
+    RPCs queued for a worker thread and (AsyncIOServer only) the event loop
+    lag in seconds. The server is saturated once any sample exceeds its
+    `max_*` threshold, and recovers only when every sample has fallen to
+    `recovery` times its threshold, so the status doesn't flap at the edge.
+    While saturated, services report `degraded_status`.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int | None = None,
+        max_queue_depth: int | None = None,
+        max_loop_lag: float | None = None,
+        recovery: float = 0.8,
+        interval: float = 0.5,
+        degraded_status: int = health_pb2.HealthCheckResponse.NOT_SERVING,
+    ) -> None:
+        if not 0 < recovery <= 1:
+            raise ValueError("recovery must be in (0, 1]")
+        self.thresholds = {
+            "in_flight": max_in_flight,
+            "queue_depth": max_queue_depth,
+            "loop_lag": max_loop_lag,
+        }
+        self.recovery = recovery
+        self.interval = interval
+        self.degraded_status = degraded_status
+        self.saturated = False
+        self._health_servicer = None
+        self._service_names: tuple[str, ...] = ()
+
+    def attach(self, health_servicer: HealthServicer, service_names) -> None:
+        """Publish status changes to `health_servicer` for `service_names`."""
+        self._health_servicer = health_servicer
+        self._service_names = tuple(service_names)
+
+    def update(
+        self, in_flight: int = 0, queue_depth: int = 0, loop_lag: float = 0.0
+    ) -> bool:
+        """Record one sample of the server's load; return whether it is saturated."""
+        samples = {
+            "in_flight": in_flight,
+            "queue_depth": queue_depth,
+            "loop_lag": loop_lag,
+        }
+        load = max(
+            (samples[name] / limit for name, limit in self.thresholds.items() if limit),
+            default=0.0,
+        )
+        if not self.saturated and load > 1:
+            self.saturated = True
+            self._publish(self.degraded_status)
+        elif self.saturated and load <= self.recovery:
+            self.saturated = False
+            self._publish(health_pb2.HealthCheckResponse.SERVING)
+        return self.saturated
+
+    def _publish(self, status: int) -> None:
+        if self._health_servicer is not None:
+            for service_name in self._service_names:
+                self._health_servicer.set(service_name, status)
+
+
+def get_rss(pid: int) -> int:
+    """Return the resident memory of a process in bytes (0 where unknown)."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class WorkerSupervisor:
+    """
+    Fork `workers` processes that each run `target`, and keep them running.
+
+    Workers bind the same port with SO_REUSEPORT, so the kernel spreads
+    connections across them. A worker that exits unexpectedly is replaced.
+    `stop` (called on SIGTERM or SIGINT) forwards SIGTERM to every worker for
+    a graceful drain, and `run` returns once all of them have exited.
+
+    Workers are also recycled without losing capacity. A replacement is
+    started first, and the old worker is drained once the replacement calls
+    `notify_ready`. This happens when a worker calls `request_retirement`,
+    when its resident memory exceeds `max_memory` bytes (checked on Linux),
+    and for every worker on `reload` (SIGHUP).
+    """
+
+    # Minimum seconds between the start and restart of a crashing worker.
+    restart_delay = 1.0
+    # Seconds between checks of worker exits and memory.
+    poll_interval = 0.5
+
+    _WAKE, _READY, _RETIRE = range(3)
+    _MESSAGE = struct.Struct("<Bi")
+
+    def __init__(
+        self,
+        workers: int,
+        target: Callable[[], None],
+        max_memory: int | None = None,
+    ) -> None:
+        if workers < 1:
+            raise ValueError("workers must be a positive integer")
+        self.workers = workers
+        self.max_memory = max_memory
+        self._target = target
+        self._pids: dict[int, float] = {}
+        self._draining: set[int] = set()
+        # Replacement worker pid -> pid of the worker it replaces.
+        self._replacing: dict[int, int] = {}
+        self._reload = False
+        self._stopping = False
+        self._read_fd, self._write_fd = os.pipe()
+
+    def run(self, install_signal_handlers: bool = True) -> None:
+        """Start the workers and supervise them until they have all exited."""
+        if install_signal_handlers:
+            for s in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(s, lambda signum, frame: self.stop())
+            signal.signal(signal.SIGHUP, lambda signum, frame: self.reload())
+
+        for _ in range(self.workers):
+            self._spawn()
+        while self._pids or self._draining:
+            readable, _, _ = select.select([self._read_fd], [], [], self.poll_interval)
+            if readable:
+                data = os.read(self._read_fd, self._MESSAGE.size * 512)
+                for kind, pid in self._MESSAGE.iter_unpack(data):
+                    self._handle_message(kind, pid)
+            self._reap()
+            if self._reload:
+                self._reload = False
+                print("Reloading workers...")
+                for pid in list(self._pids):
+                    self._replace(pid)
+            if self.max_memory is not None:
+                for pid in list(self._pids):
+                    if get_rss(pid) > self.max_memory:
+                        self._replace(pid)
+
+    def stop(self) -> None:
+        """Ask every worker to shut down gracefully."""
+        self._stopping = True
+        for pid in [*self._pids, *self._draining]:
+            with contextlib.suppress(ProcessLookupError):
+                os.kill(pid, signal.SIGTERM)
+        self._send(self._WAKE, 0)
+
+    def reload(self) -> None:
+        """Replace every worker, draining each once its replacement is ready."""
+        self._reload = True
+        self._send(self._WAKE, 0)
+
+    def notify_ready(self) -> None:
+        """Called in a worker once it is serving."""
+        self._send(self._READY, os.getpid())
+
+    def request_retirement(self) -> None:
+        """Called in a worker to have it replaced and drained."""
+        self._send(self._RETIRE, os.getpid())
+
+    def _send(self, kind: int, pid: int) -> None:
+        with contextlib.suppress(OSError):
+            os.write(self._write_fd, self._MESSAGE.pack(kind, pid))
+
+    def _handle_message(self, kind: int, pid: int) -> None:
+        if kind == self._READY:
+            old_pid = self._replacing.pop(pid, None)
+            if old_pid is not None:
+                self._drain(old_pid)
+        elif kind == self._RETIRE:
+            self._replace(pid)
+
+    def _replace(self, pid: int) -> None:
+        if self._stopping or pid not in self._pids or pid in self._replacing.values():
+            return
+        self._replacing[self._spawn()] = pid
+
+    def _drain(self, pid: int) -> None:
+        if self._pids.pop(pid, None) is not None:
+            self._draining.add(pid)
+            with contextlib.suppress(ProcessLookupError):
+                os.kill(pid, signal.SIGTERM)
+
+    def _reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            if pid in self._draining:
+                self._draining.discard(pid)
+                continue
+            started = self._pids.pop(pid, None)
+            if started is None or self._stopping:
+                continue
+
+            replaced_pid = self._replacing.pop(pid, None)
+            for new_pid, old_pid in list(self._replacing.items()):
+                if old_pid == pid:
+                    # Its replacement is already starting.
+                    del self._replacing[new_pid]
+                    break
+            else:
+                exit_code = os.waitstatus_to_exitcode(status)
+                print(f"Worker {pid} exited with status {exit_code}, restarting...")
+                if time.monotonic() - started < self.restart_delay:
+                    time.sleep(self.restart_delay)
+                if replaced_pid is not None:
+                    self._replace(replaced_pid)
+                elif not self._stopping:
+                    self._spawn()
+
+    def _spawn(self) -> int:
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 0
+            try:
+                os.close(self._read_fd)
+                for s in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+                    signal.signal(s, signal.SIG_DFL)
+                self._target()
+            except BaseException:
+                traceback.print_exc()
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+        self._pids[pid] = time.monotonic()
+        return pid
+
+
 class Server:
-    """A simple gRPC server that uses ThreadPoolExecutor for concurrency."""
+    """
+    A simple gRPC server that uses ThreadPoolExecutor for concurrency.
+
+    With `workers` > 1, code is generated and services are mounted once, then
+    `run` forks that many worker processes sharing the port (see
+    `WorkerSupervisor`). Each worker creates its own gRPC server. Workers are
+    recycled after `max_requests` RPCs or above `max_memory` bytes of
+    resident memory; setting either also runs a single worker supervised.
+
+    Admission control: at most `maximum_concurrent_rpcs` RPCs are accepted at
+    once, or `max_workers + max_queue_depth` when a queue depth is given; gRPC
+    rejects the rest immediately with RESOURCE_EXHAUSTED. With either limit
+    set, queued RPCs whose deadline has passed are dropped before they run.
+    `concurrency_limiter` builds an AdaptiveLimiter for each unary method;
+    calls are admitted as they arrive, so time queued for a worker thread
+    counts towards their latency. Without it, methods given their own limiter
+    by `limit_concurrency` are admitted once they have a worker thread.
+
+    `options` is a ServerOptions or the name of one of its presets.
+
+    Shutdown (SIGTERM or SIGINT) marks every service NOT_SERVING, waits
+    `drain_delay` seconds while still serving so load balancers stop routing
+    here, stops accepting RPCs, and gives in-flight RPCs `shutdown_grace`
+    seconds to finish before cutting them off. In-flight RPCs are counted,
+    so the number cut off can be reported, only with `load_health`.
+
+    `load_health` (a LoadAwareHealth) marks services degraded while the
+    server is saturated.
+    """
 
-    def __init__(self, max_workers: int = 8, *interceptors) -> None:
-        self._server = grpc.server(
-            futures.ThreadPoolExecutor(max_workers), interceptors=interceptors
+    def __init__(
+        self,
+        max_workers: int = 8,
+        *interceptors,
+        validation: ValidationPolicy | str | None = None,
+        wire_serialization: bool = False,
+        wire_deserialization: bool = False,
+        workers: int = 1,
+        max_requests: int | None = None,
+        max_memory: int | None = None,
+        maximum_concurrent_rpcs: int | None = None,
+        max_queue_depth: int | None = None,
+        concurrency_limiter: Callable[[], AdaptiveLimiter] | None = None,
+        options: ServerOptions | str | None = None,
+        drain_delay: float = 0.0,
+        shutdown_grace: float = 10.0,
+        load_health: LoadAwareHealth | None = None,
+    ) -> None:
+        self._options = ServerOptions.resolve(options)
+        self._load_health = load_health
+        self._stopping = threading.Event()
+        self._drain_delay = drain_delay
+        self._shutdown_grace = shutdown_grace
+        if max_queue_depth is not None:
+            if max_queue_depth < 0:
+                raise ValueError("max_queue_depth must not be negative")
+            queue_limit = max_workers + max_queue_depth
+            if maximum_concurrent_rpcs is None or queue_limit < maximum_concurrent_rpcs:
+                maximum_concurrent_rpcs = queue_limit
+        if maximum_concurrent_rpcs is not None:
+            interceptors = (ExpiredDeadlineInterceptor(), *interceptors)
+        self._max_workers = max_workers
+        self._maximum_concurrent_rpcs = maximum_concurrent_rpcs
+        self._concurrency_limiter = concurrency_limiter
+        # In-flight RPCs are only counted for `load_health`, and calls only
+        # admitted by interceptor with a `concurrency_limiter`.
+        self._in_flight = InFlightInterceptor() if load_health is not None else None
+        self._concurrency_limits = (
+            ConcurrencyLimitInterceptor() if concurrency_limiter is not None else None
         )
+        self._interceptors = (
+            *(i for i in (self._in_flight, self._concurrency_limits) if i is not None),
+            *interceptors,
+        )
+        self._health_servicer = None
+        self._workers = workers
+        self._max_requests = max_requests
+        self._max_memory = max_memory
+        self._supervised = (
+            workers > 1 or max_requests is not None or max_memory is not None
+        )
+        self._supervisor = None
+        # gRPC must not start its threads before forking workers.
+        self._server = None if self._supervised else self._create_server()
+        self._servicers = []
         self._service_names = []
+        self._process_runners: list[ProcessMethodRunner] = []
         self._package_name = ""
         self._port = 50051
+        self._validation = validation
+        self._wire_serialization = wire_serialization
+        self._wire_deserialization = wire_deserialization
+
+    def _create_server(self, options=(), interceptors=None):
+        self._thread_pool = futures.ThreadPoolExecutor(self._max_workers)
+        return grpc.server(
+            self._thread_pool,
+            interceptors=self._interceptors if interceptors is None else interceptors,
+            options=[*self._options.channel_args(), *options],
+            maximum_concurrent_rpcs=self._maximum_concurrent_rpcs,
+            compression=self._options.grpc_compression(),
+        )
 
     def set_package_name(self, package_name: str):
         """Set the package name for .proto generation."""
@@ -1152,40 +4386,133 @@ class Server:
 
     def mount_using_pb2_modules(self, pb2_grpc_module, pb2_module, obj: object):
         """Connect the compiled gRPC modules with the service implementation."""
-        concreteServiceClass = connect_obj_with_stub(pb2_grpc_module, pb2_module, obj)
+        concreteServiceClass = connect_obj_with_stub(
+            pb2_grpc_module,
+            pb2_module,
+            obj,
+            self._validation,
+            self._wire_serialization,
+            self._wire_deserialization,
+            concurrency_limiter=self._concurrency_limiter,
+            process_runners=self._process_runners,
+            limiters=(
+                self._concurrency_limits.limiters
+                if self._concurrency_limits is not None
+                else None
+            ),
+        )
         service_name = obj.__class__.__name__
         service_impl = concreteServiceClass()
-        getattr(pb2_grpc_module, f"add_{service_name}Servicer_to_server")(
-            service_impl, self._server
-        )
+        self._servicers.append((pb2_grpc_module, pb2_module, obj, service_impl))
+        if self._server is not None:
+            self._add_servicer(pb2_grpc_module, pb2_module, obj, service_impl)
         full_service_name = pb2_module.DESCRIPTOR.services_by_name[
             service_name
         ].full_name
         self._service_names.append(full_service_name)
 
-    def run(self, *objs):
-        """
-        Mount multiple services and run the gRPC server with reflection and health check.
-        Press Ctrl+C or send SIGTERM to stop.
-        """
-        for obj in objs:
-            self.mount(obj, self._package_name)
+    def _add_servicer(self, pb2_grpc_module, pb2_module, obj, service_impl):
+        add_servicer_to_server(
+            pb2_grpc_module,
+            pb2_module,
+            obj,
+            service_impl,
+            self._server,
+            self._wire_serialization,
+            self._validation,
+            self._wire_deserialization,
+        )
 
+    def _start(self):
         SERVICE_NAMES = (
             health_pb2.DESCRIPTOR.services_by_name["Health"].full_name,
             reflection.SERVICE_NAME,
             *self._service_names,
         )
-        health_servicer = HealthServicer()
+        health_servicer = self._health_servicer = HealthServicer()
         health_pb2_grpc.add_HealthServicer_to_server(health_servicer, self._server)
         reflection.enable_server_reflection(SERVICE_NAMES, self._server)
+        for service_name in ("", *self._service_names):
+            health_servicer.set(service_name, health_pb2.HealthCheckResponse.SERVING)
+        if self._load_health is not None:
+            self._load_health.attach(health_servicer, ("", *self._service_names))
 
         self._server.add_insecure_port(f"[::]:{self._port}")
         self._server.start()
+        if self._load_health is not None:
+            threading.Thread(target=self._watch_load, daemon=True).start()
+
+    def _watch_load(self):
+        health = self._load_health
+        while not self._stopping.wait(health.interval):
+            queue_depth = executor_queue_depth(self._thread_pool)
+            health.update(self._in_flight.in_flight, queue_depth)
+
+    def _drain(self) -> int | None:
+        """
+        Shut down gracefully; return the number of RPCs cut off, or None if
+        some were but, without `load_health`, they weren't counted.
+        """
+        if self._health_servicer is None:
+            return 0
+        self._stopping.set()
+        self._health_servicer.enter_graceful_shutdown()
+        time.sleep(self._drain_delay)
+        # A longer grace than ours: the server only stops accepting RPCs.
+        stopped = self._server.stop(self._shutdown_grace + 1)
+        cut = 0
+        if not stopped.wait(self._shutdown_grace):
+            cut = _count_cut_off(self._in_flight)
+            self._server.stop(0)
+        stopped.wait()
+        for runner in self._process_runners:
+            runner.shutdown()
+        return cut
+
+    def _serve_worker(self):
+        interceptors = self._interceptors
+        if self._max_requests:
+            limit = RequestLimitInterceptor(
+                self._max_requests, self._supervisor.request_retirement
+            )
+            interceptors = (limit, *interceptors)
+        self._server = self._create_server([("grpc.so_reuseport", 1)], interceptors)
+        for servicer in self._servicers:
+            self._add_servicer(*servicer)
+        self._start()
+        self._supervisor.notify_ready()
+
+        def handle_signal(signal, frame):
+            self._drain()
+
+        signal.signal(signal.SIGINT, handle_signal)
+        signal.signal(signal.SIGTERM, handle_signal)
+
+        print(f"gRPC server worker {os.getpid()} is running...")
+        self._server.wait_for_termination()
+
+    def run(self, *objs):
+        """
+        Mount multiple services and run the gRPC server with reflection and health check.
+        Press Ctrl+C or send SIGTERM to stop.
+        """
+        for obj in objs:
+            self.mount(obj, self._package_name)
+
+        if self._supervised:
+            print(f"Starting {self._workers} gRPC server workers...")
+            self._supervisor = WorkerSupervisor(
+                self._workers, self._serve_worker, self._max_memory
+            )
+            self._supervisor.run()
+            print("gRPC server shutdown.")
+            return
+
+        self._start()
 
         def handle_signal(signal, frame):
             print("Received shutdown signal...")
-            self._server.stop(grace=10)
+            self._drain()
             print("gRPC server shutdown.")
             sys.exit(0)
 
@@ -1198,13 +4525,90 @@ class Server:
 
 
 class AsyncIOServer:
-    """An async gRPC server using asyncio."""
+    """
+    An async gRPC server using asyncio.
+
+    With `workers` > 1, `run` forks that many worker processes sharing the
+    port, each running its own event loop (see `WorkerSupervisor`).
+    `max_requests` and `max_memory` recycle workers as in `Server`.
+
+    Sync methods run in `executor` unless decorated with `run_inline`; without
+    one, the server installs its own thread pool as the loop's default
+    executor, so its queue can be sampled. `concurrency_limiter`, `options`,
+    `drain_delay`, `shutdown_grace` and `load_health` work as in `Server`;
+    with `load_health`, event loop lag is sampled too.
+    """
 
-    def __init__(self, *interceptors) -> None:
-        self._server = grpc.aio.server(interceptors=interceptors)
+    def __init__(
+        self,
+        *interceptors,
+        validation: ValidationPolicy | str | None = None,
+        wire_serialization: bool = False,
+        wire_deserialization: bool = False,
+        workers: int = 1,
+        max_requests: int | None = None,
+        max_memory: int | None = None,
+        executor: futures.Executor | None = None,
+        concurrency_limiter: Callable[[], AdaptiveLimiter] | None = None,
+        options: ServerOptions | str | None = None,
+        drain_delay: float = 0.0,
+        shutdown_grace: float = 10.0,
+        load_health: LoadAwareHealth | None = None,
+    ) -> None:
+        self._options = ServerOptions.resolve(options)
+        self._load_health = load_health
+        self._load_task = None
+        self._loop_factory = None
+        self._default_executor_workers = None
+        self._slow_callback_duration = None
+        self._drain_delay = drain_delay
+        self._shutdown_grace = shutdown_grace
+        self._in_flight = (
+            AsyncInFlightInterceptor() if load_health is not None else None
+        )
+        self._interceptors = (
+            (self._in_flight, *interceptors)
+            if self._in_flight is not None
+            else interceptors
+        )
+        self._health_servicer = None
+        self._executor = executor
+        # The executor running sync methods; `_start` creates it if not given.
+        self._sync_executor = executor
+        self._concurrency_limiter = concurrency_limiter
+        self._workers = workers
+        self._max_requests = max_requests
+        self._max_memory = max_memory
+        self._supervised = (
+            workers > 1 or max_requests is not None or max_memory is not None
+        )
+        self._supervisor = None
+        # gRPC must not start its threads before forking workers, and a
+        # grpc.aio server belongs to the event loop it is created on: without
+        # a running loop, `run` creates it.
+        self._server = None
+        if not self._supervised:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                pass
+            else:
+                self._server = self._create_server()
+        self._servicers = []
         self._service_names = []
+        self._process_runners: list[ProcessMethodRunner] = []
         self._package_name = ""
         self._port = 50051
+        self._validation = validation
+        self._wire_serialization = wire_serialization
+        self._wire_deserialization = wire_deserialization
+
+    def _create_server(self, options=(), interceptors=None):
+        return grpc.aio.server(
+            interceptors=self._interceptors if interceptors is None else interceptors,
+            options=[*self._options.channel_args(), *options],
+            compression=self._options.grpc_compression(),
+        )
 
     def set_package_name(self, package_name: str):
         """Set the package name for .proto generation."""
@@ -1222,52 +4626,198 @@ class AsyncIOServer:
     def mount_using_pb2_modules(self, pb2_grpc_module, pb2_module, obj: object):
         """Connect the compiled gRPC modules with the async service implementation."""
         concreteServiceClass = connect_obj_with_stub_async(
-            pb2_grpc_module, pb2_module, obj
+            pb2_grpc_module,
+            pb2_module,
+            obj,
+            self._validation,
+            self._wire_serialization,
+            self._wire_deserialization,
+            self._executor,
+            self._concurrency_limiter,
+            self._process_runners,
         )
         service_name = obj.__class__.__name__
         service_impl = concreteServiceClass()
-        getattr(pb2_grpc_module, f"add_{service_name}Servicer_to_server")(
-            service_impl, self._server
-        )
+        self._servicers.append((pb2_grpc_module, pb2_module, obj, service_impl))
+        if self._server is not None:
+            self._add_servicer(pb2_grpc_module, pb2_module, obj, service_impl)
         full_service_name = pb2_module.DESCRIPTOR.services_by_name[
             service_name
         ].full_name
         self._service_names.append(full_service_name)
 
-    async def run(self, *objs):
-        """
-        Mount multiple async services and run the gRPC server with reflection and health check.
-        Press Ctrl+C or send SIGTERM to stop.
-        """
-        for obj in objs:
-            self.mount(obj, self._package_name)
+    def _add_servicer(self, pb2_grpc_module, pb2_module, obj, service_impl):
+        add_servicer_to_server(
+            pb2_grpc_module,
+            pb2_module,
+            obj,
+            service_impl,
+            self._server,
+            self._wire_serialization,
+            self._validation,
+            self._wire_deserialization,
+        )
 
+    async def _start(self):
         SERVICE_NAMES = (
             health_pb2.DESCRIPTOR.services_by_name["Health"].full_name,
             reflection.SERVICE_NAME,
             *self._service_names,
         )
-        health_servicer = HealthServicer()
+        health_servicer = self._health_servicer = HealthServicer()
         health_pb2_grpc.add_HealthServicer_to_server(health_servicer, self._server)
         reflection.enable_server_reflection(SERVICE_NAMES, self._server)
+        for service_name in ("", *self._service_names):
+            health_servicer.set(service_name, health_pb2.HealthCheckResponse.SERVING)
+        if self._load_health is not None:
+            self._load_health.attach(health_servicer, ("", *self._service_names))
+
+        if self._sync_executor is None:
+            # Sync methods run in the loop's default executor: own it, so its
+            # queue can be sampled.
+            self._sync_executor = futures.ThreadPoolExecutor(
+                self._default_executor_workers
+            )
+            asyncio.get_running_loop().set_default_executor(self._sync_executor)
 
         self._server.add_insecure_port(f"[::]:{self._port}")
         await self._server.start()
+        if self._load_health is not None:
+            self._load_task = asyncio.create_task(self._watch_load())
+
+    async def _watch_load(self):
+        loop = asyncio.get_running_loop()
+        health = self._load_health
+        while True:
+            start = loop.time()
+            await asyncio.sleep(health.interval)
+            lag = loop.time() - start - health.interval
+            queue_depth = executor_queue_depth(self._sync_executor)
+            health.update(self._in_flight.in_flight, queue_depth, lag)
+
+    async def _drain(self) -> int | None:
+        """Shut down gracefully; return the number of RPCs cut off as in `Server`."""
+        if self._health_servicer is None:
+            return 0
+        if self._load_task is not None:
+            self._load_task.cancel()
+        self._health_servicer.enter_graceful_shutdown()
+        await asyncio.sleep(self._drain_delay)
+        # A longer grace than ours: the server only stops accepting RPCs.
+        stopping = asyncio.ensure_future(self._server.stop(self._shutdown_grace + 1))
+        done, _ = await asyncio.wait({stopping}, timeout=self._shutdown_grace)
+        cut = 0
+        if not done:
+            cut = _count_cut_off(self._in_flight)
+            await self._server.stop(0)
+        await stopping
+        for runner in self._process_runners:
+            await asyncio.to_thread(runner.shutdown)
+        return cut
+
+    async def _serve_worker(self):
+        interceptors = self._interceptors
+        if self._max_requests:
+            limit = AsyncRequestLimitInterceptor(
+                self._max_requests, self._supervisor.request_retirement
+            )
+            interceptors = (limit, *interceptors)
+        self._server = self._create_server([("grpc.so_reuseport", 1)], interceptors)
+        for servicer in self._servicers:
+            self._add_servicer(*servicer)
+        await self._start()
+        self._supervisor.notify_ready()
+
+        shutdown_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for s in [signal.SIGTERM, signal.SIGINT]:
+            loop.add_signal_handler(s, shutdown_event.set)
+
+        print(f"gRPC server worker {os.getpid()} is running...")
+        await shutdown_event.wait()
+        await self._drain()
+
+    async def run(self, *objs):
+        """
+        Mount multiple async services and run the gRPC server with reflection and health check.
+        Press Ctrl+C or send SIGTERM to stop.
+        """
+        for obj in objs:
+            self.mount(obj, self._package_name)
+
+        if self._supervised:
+            print(f"Starting {self._workers} gRPC server workers...")
+            supervisor = self._supervisor = WorkerSupervisor(
+                self._workers,
+                lambda: self._run_loop(self._serve_worker()),
+                self._max_memory,
+            )
+            # Workers are forked from a thread without a running event loop.
+            loop = asyncio.get_running_loop()
+            for s in [signal.SIGTERM, signal.SIGINT]:
+                loop.add_signal_handler(s, supervisor.stop)
+            loop.add_signal_handler(signal.SIGHUP, supervisor.reload)
+            await asyncio.to_thread(supervisor.run, False)
+            print("gRPC server shutdown.")
+            return
+
+        if self._server is None:
+            self._server = self._create_server()
+            for servicer in self._servicers:
+                self._add_servicer(*servicer)
+        await self._start()
 
         shutdown_event = asyncio.Event()
 
-        def shutdown(signum, frame):
+        def shutdown():
             print("Received shutdown signal...")
             shutdown_event.set()
 
+        loop = asyncio.get_running_loop()
         for s in [signal.SIGTERM, signal.SIGINT]:
-            signal.signal(s, shutdown)
+            loop.add_signal_handler(s, shutdown)
 
         print("gRPC server is running...")
         await shutdown_event.wait()
-        await self._server.stop(10)
+        await self._drain()
         print("gRPC server shutdown.")
 
+    def serve(
+        self,
+        *objs,
+        use_uvloop: bool | None = None,
+        default_executor_workers: int | None = None,
+        slow_callback_duration: float | None = None,
+    ) -> None:
+        """
+        Mount multiple async services and run the server on its own event loop
+        until SIGTERM or SIGINT; the blocking counterpart of `run`.
+
+        use_uvloop: run on uvloop (`pip install pydantic-rpc[uvloop]`). None
+            uses it when it is installed; True raises ImportError otherwise.
+        default_executor_workers: size of the loop's default executor, which
+            runs sync methods unless the server was given an `executor`.
+        slow_callback_duration: enable asyncio debug mode and log callbacks
+            blocking the loop for longer than this many seconds. Debug mode
+            slows the loop down, so use it only while investigating.
+        """
+        if use_uvloop and uvloop is None:
+            raise ImportError("uvloop is not installed")
+        if use_uvloop is not False and uvloop is not None:
+            self._loop_factory = uvloop.new_event_loop
+        self._default_executor_workers = default_executor_workers
+        self._slow_callback_duration = slow_callback_duration
+        self._run_loop(self.run(*objs))
+
+    def _run_loop(self, coro):
+        """Run `coro` on a new event loop configured by `serve`."""
+        with asyncio.Runner(loop_factory=self._loop_factory) as runner:
+            loop = runner.get_loop()
+            if self._slow_callback_duration is not None:
+                loop.set_debug(True)
+                loop.slow_callback_duration = self._slow_callback_duration
+            return runner.run(coro)
+
 
 class WSGIApp:
     """
@@ -1275,10 +4825,21 @@ class WSGIApp:
     Useful for embedding gRPC within an existing WSGI stack.
     """
 
-    def __init__(self, app):
+    def __init__(
+        self,
+        app,
+        validation: ValidationPolicy | str | None = None,
+        wire_serialization: bool = False,
+        wire_deserialization: bool = False,
+        concurrency_limiter: Callable[[], AdaptiveLimiter] | None = None,
+    ):
         self._app = grpcWSGI(app)
+        self._concurrency_limiter = concurrency_limiter
         self._service_names = []
         self._package_name = ""
+        self._validation = validation
+        self._wire_serialization = wire_serialization
+        self._wire_deserialization = wire_deserialization
 
     def mount(self, obj: object, package_name: str = ""):
         """Generate and compile proto files, then mount the service implementation."""
@@ -1287,11 +4848,26 @@ class WSGIApp:
 
     def mount_using_pb2_modules(self, pb2_grpc_module, pb2_module, obj: object):
         """Connect the compiled gRPC modules with the service implementation."""
-        concreteServiceClass = connect_obj_with_stub(pb2_grpc_module, pb2_module, obj)
+        concreteServiceClass = connect_obj_with_stub(
+            pb2_grpc_module,
+            pb2_module,
+            obj,
+            self._validation,
+            self._wire_serialization,
+            self._wire_deserialization,
+            concurrency_limiter=self._concurrency_limiter,
+        )
         service_name = obj.__class__.__name__
         service_impl = concreteServiceClass()
-        getattr(pb2_grpc_module, f"add_{service_name}Servicer_to_server")(
-            service_impl, self._app
+        add_servicer_to_server(
+            pb2_grpc_module,
+            pb2_module,
+            obj,
+            service_impl,
+            self._app,
+            self._wire_serialization,
+            self._validation,
+            self._wire_deserialization,
         )
         full_service_name = pb2_module.DESCRIPTOR.services_by_name[
             service_name
@@ -1311,13 +4887,27 @@ class WSGIApp:
 class ASGIApp:
     """
     An ASGI-compatible application that can serve gRPC via sonora's grpcASGI.
-    Useful for embedding gRPC within an existing ASGI stack.
+    Useful for embedding gRPC within an existing ASGI stack. Sync methods run
+    in `executor`, as with AsyncIOServer.
     """
 
-    def __init__(self, app):
+    def __init__(
+        self,
+        app,
+        validation: ValidationPolicy | str | None = None,
+        wire_serialization: bool = False,
+        wire_deserialization: bool = False,
+        executor: futures.Executor | None = None,
+        concurrency_limiter: Callable[[], AdaptiveLimiter] | None = None,
+    ):
         self._app = grpcASGI(app)
+        self._executor = executor
+        self._concurrency_limiter = concurrency_limiter
         self._service_names = []
         self._package_name = ""
+        self._validation = validation
+        self._wire_serialization = wire_serialization
+        self._wire_deserialization = wire_deserialization
 
     def mount(self, obj: object, package_name: str = ""):
         """Generate and compile proto files, then mount the async service implementation."""
@@ -1327,12 +4917,26 @@ class ASGIApp:
     def mount_using_pb2_modules(self, pb2_grpc_module, pb2_module, obj: object):
         """Connect the compiled gRPC modules with the async service implementation."""
         concreteServiceClass = connect_obj_with_stub_async(
-            pb2_grpc_module, pb2_module, obj
+            pb2_grpc_module,
+            pb2_module,
+            obj,
+            self._validation,
+            self._wire_serialization,
+            self._wire_deserialization,
+            self._executor,
+            self._concurrency_limiter,
         )
         service_name = obj.__class__.__name__
         service_impl = concreteServiceClass()
-        getattr(pb2_grpc_module, f"add_{service_name}Servicer_to_server")(
-            service_impl, self._app
+        add_servicer_to_server(
+            pb2_grpc_module,
+            pb2_module,
+            obj,
+            service_impl,
+            self._app,
+            self._wire_serialization,
+            self._validation,
+            self._wire_deserialization,
         )
         full_service_name = pb2_module.DESCRIPTOR.services_by_name[
             service_name
@@ -1353,15 +4957,128 @@ def get_connecpy_server_class(connecpy_module, service_name):
     return getattr(connecpy_module, f"{service_name}Server")
 
 
+def get_compression_policies(obj: object, full_service_name: str) -> dict[str, dict]:
+    """Map the HTTP paths of a service's methods to their compression policies."""
+    policies = {}
+    for method_name, method in get_rpc_methods(obj):
+        policy = get_method_option(method, "compression")
+        if policy is not None:
+            policies[f"/{full_service_name}/{method_name}"] = policy
+    return policies
+
+
+def accepts_encoding(accept_encoding: str, name: str) -> bool:
+    """Whether an Accept-Encoding header value allows the content coding `name`."""
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        if coding.strip().lower() not in (name, "*"):
+            continue
+        key, _, q = params.strip().partition("=")
+        try:
+            return key != "q" or float(q) > 0
+        except ValueError:
+            return False
+    return False
+
+
+def compress_body(data: bytes, algorithm: str) -> bytes:
+    """Compress an HTTP body with the "gzip" or "deflate" content coding."""
+    if algorithm == "gzip":
+        return gzip.compress(data)
+    return zlib.compress(data)
+
+
+def compressing_asgi_send(
+    send: Callable, policy: dict, accept_encoding: str
+) -> Callable:
+    """
+    Wrap an ASGI `send` so a successful, single-body response of at least the
+    policy's `min_size` is compressed, if the client accepts the algorithm.
+    """
+    algorithm = policy["algorithm"]
+    if algorithm == "none" or not accepts_encoding(accept_encoding, algorithm):
+        return send
+    start = None
+
+    async def send_compressed(message):
+        nonlocal start
+        if message["type"] == "http.response.start":
+            start = message
+            return
+        if start is not None:
+            headers = start["headers"]
+            body = message.get("body", b"")
+            if (
+                start["status"] == 200
+                and not message.get("more_body", False)
+                and len(body) >= policy["min_size"]
+            ):
+                body = compress_body(body, algorithm)
+                headers = [(k, v) for k, v in headers if k.lower() != b"content-length"]
+                headers.append((b"content-encoding", algorithm.encode()))
+                headers.append((b"content-length", str(len(body)).encode()))
+                message = {**message, "body": body}
+            await send({**start, "headers": headers})
+            start = None
+        await send(message)
+
+    return send_compressed
+
+
+def compress_wsgi_response(app: Callable, environ, start_response, policy: dict):
+    """
+    Call a WSGI app and compress its successful response of at least the
+    policy's `min_size`, if the client accepts the algorithm.
+    """
+    accept_encoding = environ.get("HTTP_ACCEPT_ENCODING", "")
+    environ = {k: v for k, v in environ.items() if k != "HTTP_ACCEPT_ENCODING"}
+    algorithm = policy["algorithm"]
+    if algorithm == "none" or not accepts_encoding(accept_encoding, algorithm):
+        return app(environ, start_response)
+
+    captured = []
+    written = []
+
+    def capture(status, headers, exc_info=None):
+        captured[:] = [status, headers, exc_info]
+        return written.append
+
+    result = app(environ, capture)
+    try:
+        body = b"".join([*written, *result])
+    finally:
+        if hasattr(result, "close"):
+            result.close()
+    status, headers, exc_info = captured
+    if status.startswith("200") and len(body) >= policy["min_size"]:
+        body = compress_body(body, algorithm)
+        headers = [(k, v) for k, v in headers if k.lower() != "content-length"]
+        headers.append(("Content-Encoding", algorithm))
+        headers.append(("Content-Length", str(len(body))))
+    start_response(status, headers, exc_info)
+    return [body]
+
+
 class ConnecpyASGIApp:
     """
     An ASGI-compatible application that can serve Connect-RPC via Connecpy's ConnecpyASGIApp.
+    Sync methods run in `executor` (the event loop's default executor if None)
+    unless decorated with `run_inline`.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        validation: ValidationPolicy | str | None = None,
+        executor: futures.Executor | None = None,
+        concurrency_limiter: Callable[[], AdaptiveLimiter] | None = None,
+    ):
         self._app = ConnecpyASGI()
+        self._executor = executor
+        self._concurrency_limiter = concurrency_limiter
+        self._compression = {}
         self._service_names = []
         self._package_name = ""
+        self._validation = validation
 
     def mount(self, obj: object, package_name: str = ""):
         """Generate and compile proto files, then mount the async service implementation."""
@@ -1373,7 +5090,12 @@ class ConnecpyASGIApp:
     def mount_using_pb2_modules(self, connecpy_module, pb2_module, obj: object):
         """Connect the compiled connecpy and pb2 modules with the async service implementation."""
         concreteServiceClass = connect_obj_with_stub_async_connecpy(
-            connecpy_module, pb2_module, obj
+            connecpy_module,
+            pb2_module,
+            obj,
+            self._validation,
+            self._executor,
+            self._concurrency_limiter,
         )
         service_name = obj.__class__.__name__
         service_impl = concreteServiceClass()
@@ -1383,6 +5105,7 @@ class ConnecpyASGIApp:
             service_name
         ].full_name
         self._service_names.append(full_service_name)
+        self._compression.update(get_compression_policies(obj, full_service_name))
 
     def mount_objs(self, *objs):
         """Mount multiple service objects into this ASGI app."""
@@ -1391,6 +5114,20 @@ class ConnecpyASGIApp:
 
     async def __call__(self, scope, receive, send):
         """ASGI entry point."""
+        policy = self._compression.get(scope.get("path"))
+        if scope["type"] != "http" or policy is None:
+            await self._app(scope, receive, send)
+            return
+        headers = scope.get("headers", [])
+        accept_encoding = b",".join(
+            v for k, v in headers if k.lower() == b"accept-encoding"
+        ).decode("latin-1")
+        # Compression is decided here, after the response size is known.
+        scope = {
+            **scope,
+            "headers": [(k, v) for k, v in headers if k.lower() != b"accept-encoding"],
+        }
+        send = compressing_asgi_send(send, policy, accept_encoding)
         await self._app(scope, receive, send)
 
 
@@ -1399,10 +5136,17 @@ class ConnecpyWSGIApp:
     A WSGI-compatible application that can serve Connect-RPC via Connecpy's ConnecpyWSGIApp.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        validation: ValidationPolicy | str | None = None,
+        concurrency_limiter: Callable[[], AdaptiveLimiter] | None = None,
+    ):
         self._app = ConnecpyWSGI()
+        self._concurrency_limiter = concurrency_limiter
+        self._compression = {}
         self._service_names = []
         self._package_name = ""
+        self._validation = validation
 
     def mount(self, obj: object, package_name: str = ""):
         """Generate and compile proto files, then mount the async service implementation."""
@@ -1414,7 +5158,11 @@ class ConnecpyWSGIApp:
     def mount_using_pb2_modules(self, connecpy_module, pb2_module, obj: object):
         """Connect the compiled connecpy and pb2 modules with the async service implementation."""
         concreteServiceClass = connect_obj_with_stub_connecpy(
-            connecpy_module, pb2_module, obj
+            connecpy_module,
+            pb2_module,
+            obj,
+            self._validation,
+            self._concurrency_limiter,
         )
         service_name = obj.__class__.__name__
         service_impl = concreteServiceClass()
@@ -1424,6 +5172,7 @@ class ConnecpyWSGIApp:
             service_name
         ].full_name
         self._service_names.append(full_service_name)
+        self._compression.update(get_compression_policies(obj, full_service_name))
 
     def mount_objs(self, *objs):
         """Mount multiple service objects into this WSGI app."""
@@ -1432,7 +5181,10 @@ class ConnecpyWSGIApp:
 
     def __call__(self, environ, start_response):
         """WSGI entry point."""
-        return self._app(environ, start_response)
+        policy = self._compression.get(environ.get("PATH_INFO"))
+        if policy is None:
+            return self._app(environ, start_response)
+        return compress_wsgi_response(self._app, environ, start_response, policy)
 
 
 def main():
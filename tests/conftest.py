@@ -0,0 +1,28 @@
+import importlib.resources
+import os
+import shutil
+
+import pytest
+
+from pydantic_rpc.core import generate_and_compile_proto
+
+
+@pytest.fixture(scope="module")
+def compile_proto(tmp_path_factory):
+    """Generate and compile a service's proto in a temporary directory."""
+    workdir = tmp_path_factory.mktemp("proto")
+    # protoc resolves google/protobuf/*.proto imports relative to the cwd.
+    shutil.copytree(
+        importlib.resources.files("grpc_tools") / "_proto" / "google",
+        workdir / "google",
+    )
+
+    def compile_(obj):
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            return generate_and_compile_proto(obj)
+        finally:
+            os.chdir(cwd)
+
+    return compile_
@@ -0,0 +1,64 @@
+"""Messages covering every supported field kind, shared by the test modules."""
+
+import datetime
+import enum
+
+from pydantic_rpc import Message
+
+
+class Color(enum.Enum):
+    RED = 0
+    GREEN = 1
+
+
+class Point(Message):
+    x: int
+    y: int
+
+
+class Line(Message):
+    start: Point
+    end: Point
+
+
+class RichRequest(Message):
+    """A request exercising every supported field kind."""
+
+    text: str
+    count: int
+    ratio: float
+    flag: bool
+    color: Color
+    point: Point
+    line: Line
+    numbers: list[int]
+    labels: dict[str, int]
+    created_at: datetime.datetime
+    elapsed: datetime.timedelta
+    value: int | str | Point
+
+
+class RichResponse(Message):
+    request: RichRequest
+
+
+class ConverterService:
+    def echo(self, request: RichRequest) -> RichResponse:
+        return RichResponse(request=request)
+
+
+def make_request() -> RichRequest:
+    return RichRequest(
+        text="hello",
+        count=3,
+        ratio=0.5,
+        flag=True,
+        color=Color.GREEN,
+        point=Point(x=1, y=2),
+        line=Line(start=Point(x=3, y=4), end=Point(x=-5, y=6)),
+        numbers=[1, 2, 3],
+        labels={"a": 1},
+        created_at=datetime.datetime(2024, 1, 2, 3, 4, 5),
+        elapsed=datetime.timedelta(seconds=90),
+        value=Point(x=7, y=8),
+    )
@@ -0,0 +1,105 @@
+import os
+
+import grpc
+
+from pydantic_rpc import Message, Server
+from pydantic_rpc import core
+
+from rich_messages import ConverterService, RichRequest, make_request
+
+
+class CachedRequest(Message):
+    name: str
+
+
+class CachedResponse(Message):
+    greeting: str
+
+
+class CachedService:
+    def greet(self, request: CachedRequest) -> CachedResponse:
+        return CachedResponse(greeting=f"Hello, {request.name}!")
+
+
+def test_codegen_cache_skips_protoc(tmp_path, monkeypatch):
+    monkeypatch.setenv("PYDANTIC_RPC_CODEGEN_CACHE", "true")
+    monkeypatch.setenv("PYDANTIC_RPC_CACHE_DIR", str(tmp_path))
+    monkeypatch.chdir(tmp_path)
+
+    pb2_grpc_module, pb2_module = core.generate_and_compile_proto(CachedService())
+    assert hasattr(pb2_grpc_module, "CachedServiceServicer")
+    assert pb2_module.CachedRequest(name="a").name == "a"
+    assert not os.path.exists(tmp_path / "cachedservice.proto")
+
+    def fail(args):
+        raise AssertionError("protoc should not run for a cached schema")
+
+    monkeypatch.setattr(core.protoc, "main", fail)
+    pb2_grpc_module, _ = core.generate_and_compile_proto(CachedService())
+    assert hasattr(pb2_grpc_module, "CachedServiceServicer")
+
+
+class MemoryService(ConverterService):
+    pass
+
+
+def test_in_memory_codegen_round_trip(monkeypatch):
+    monkeypatch.setenv("PYDANTIC_RPC_CODEGEN", "memory")
+    monkeypatch.setattr(core.protoc, "main", None)
+
+    pb2_grpc_module, pb2_module = core.generate_and_compile_proto(MemoryService())
+    assert hasattr(pb2_grpc_module, "MemoryServiceServicer")
+    assert pb2_module.DESCRIPTOR.package == "memory.v1"
+
+    request = make_request()
+    data = core.get_wire_serializer(RichRequest)(request)
+    proto = pb2_module.RichRequest.FromString(data)
+    assert proto.WhichOneof("value") == "value_Point"
+    assert core.generate_message_converter(RichRequest, pb2_module)(proto) == request
+
+
+class InMemoryService(CachedService):
+    pass
+
+
+def test_in_memory_codegen_serves_requests(monkeypatch):
+    monkeypatch.setenv("PYDANTIC_RPC_CODEGEN", "memory")
+    server = Server()
+    server.mount(InMemoryService())
+    port = server._server.add_insecure_port("127.0.0.1:0")
+    server._server.start()
+    try:
+        pb2_grpc_module, pb2_module = core.generate_and_compile_proto(InMemoryService())
+        with grpc.insecure_channel(f"127.0.0.1:{port}") as channel:
+            stub = pb2_grpc_module.InMemoryServiceStub(channel)
+            response = stub.Greet(pb2_module.CachedRequest(name="memory"))
+        assert response.greeting == "Hello, memory!"
+    finally:
+        server._server.stop(None)
+
+
+class CamelMapRequest(Message):
+    labelCounts: dict[str, int]
+    by_name: dict[str, int]
+
+
+class CamelMapService:
+    def count(self, request: CamelMapRequest) -> CamelMapRequest:
+        return request
+
+
+class MemoryCamelMapService(CamelMapService):
+    pass
+
+
+def test_in_memory_map_entries_match_protoc(compile_proto, monkeypatch):
+    _, pb2_module = compile_proto(CamelMapService())
+    monkeypatch.setenv("PYDANTIC_RPC_CODEGEN", "memory")
+    _, memory_module = core.generate_and_compile_proto(MemoryCamelMapService())
+
+    def entry_names(module):
+        message = module.DESCRIPTOR.message_types_by_name["CamelMapRequest"]
+        return sorted(message.nested_types_by_name)
+
+    assert entry_names(memory_module) == entry_names(pb2_module)
+    assert entry_names(pb2_module) == ["ByNameEntry", "LabelCountsEntry"]
@@ -0,0 +1,210 @@
+import datetime
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Annotated
+
+import pytest
+from google.protobuf.message import DecodeError
+from pydantic import Field, ValidationError
+
+from pydantic_rpc import Message, ValidationPolicy
+from pydantic_rpc.core import (
+    convert_python_message_to_proto,
+    generate_message_converter,
+    get_lazy_message_class,
+    get_message_encoder,
+    get_wire_deserializer,
+    get_wire_serializer,
+)
+
+from rich_messages import (
+    Color,
+    ConverterService,
+    Line,
+    Point,
+    RichRequest,
+    make_request,
+)
+
+
+@pytest.fixture(scope="module")
+def pb2_module(compile_proto):
+    _, pb2_module = compile_proto(ConverterService())
+    return pb2_module
+
+
+def test_compiled_converter_round_trip(pb2_module):
+    request = make_request()
+    proto = convert_python_message_to_proto(request, RichRequest, pb2_module)
+
+    converter = generate_message_converter(RichRequest, pb2_module)
+    assert converter(proto) == request
+
+
+def test_compiled_converter_is_shared(pb2_module):
+    converter = generate_message_converter(RichRequest, pb2_module)
+    assert generate_message_converter(RichRequest, pb2_module) is converter
+
+
+def test_compiled_encoder(pb2_module):
+    encoder = get_message_encoder(Line, pb2_module)
+    assert get_message_encoder(Line, pb2_module) is encoder
+
+    proto = encoder(Line(start=Point(x=1, y=2), end=Point(x=3, y=4)))
+    assert proto == pb2_module.Line(
+        start=pb2_module.Point(x=1, y=2), end=pb2_module.Point(x=3, y=4)
+    )
+
+
+class Quantity(Message):
+    amount: Annotated[int, Field(ge=0)]
+
+
+def test_trusted_validation_skips_pydantic():
+    policy = ValidationPolicy("trusted")
+    converter = policy.build_converter(Quantity, None, "Shop.buy")
+
+    quantity = converter(SimpleNamespace(amount=-1))
+    assert isinstance(quantity, Quantity)
+    assert quantity.amount == -1
+
+    with pytest.raises(ValidationError):
+        generate_message_converter(Quantity)(SimpleNamespace(amount=-1))
+
+
+def test_sampled_validation_reports_violations():
+    seen = []
+    policy = ValidationPolicy(
+        "sampled", sample_rate=2, on_violation=lambda name, e: seen.append(name)
+    )
+    converter = policy.build_converter(Quantity, None, "Shop.buy")
+
+    results = [converter(SimpleNamespace(amount=-1)) for _ in range(4)]
+    assert [q.amount for q in results] == [-1] * 4
+    assert policy.sampled["Shop.buy"] == 2
+    assert policy.violations["Shop.buy"] == 2
+    assert seen == ["Shop.buy", "Shop.buy"]
+
+
+def test_sampled_validation_counts_across_threads():
+    policy = ValidationPolicy("sampled", sample_rate=1)
+    converter = policy.build_converter(Quantity, None, "Shop.buy")
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(converter, [SimpleNamespace(amount=-1)] * 2000))
+    assert policy.sampled["Shop.buy"] == 2000
+    assert policy.violations["Shop.buy"] == 2000
+
+
+def test_lazy_request_converts_on_first_access(pb2_module):
+    proto = convert_python_message_to_proto(make_request(), RichRequest, pb2_module)
+    lazy = get_lazy_message_class(RichRequest, pb2_module).from_proto(proto)
+
+    assert isinstance(lazy, RichRequest)
+    assert lazy.__dict__ == {}
+    assert lazy.point == Point(x=1, y=2)
+    assert list(lazy.__dict__) == ["point"]
+    assert lazy == make_request()
+    assert lazy.model_dump() == make_request().model_dump()
+
+
+def test_lazy_request_pickles_as_its_message(pb2_module):
+    proto = convert_python_message_to_proto(make_request(), RichRequest, pb2_module)
+    lazy = get_lazy_message_class(RichRequest, pb2_module).from_proto(proto)
+    assert lazy.text == "hello"
+
+    restored = pickle.loads(pickle.dumps(lazy))
+    assert type(restored) is RichRequest
+    assert restored == make_request()
+
+
+def test_lazy_request_validates_fields():
+    lazy = get_lazy_message_class(Quantity).from_proto(SimpleNamespace(amount=-1))
+    with pytest.raises(ValidationError):
+        lazy.amount
+
+    trusted = get_lazy_message_class(Quantity, validate=False)
+    assert trusted.from_proto(SimpleNamespace(amount=-1)).amount == -1
+
+
+@pytest.mark.parametrize(
+    "value, member",
+    [(1, "value_int32"), ("one", "value_string"), (Point(x=1, y=1), "value_Point")],
+)
+def test_union_fields_use_oneof_members(pb2_module, value, member):
+    request = make_request().model_copy(update={"value": value})
+    proto = get_message_encoder(RichRequest, pb2_module)(request)
+    assert proto.WhichOneof("value") == member
+
+    converter = generate_message_converter(RichRequest, pb2_module)
+    assert converter(proto).value == value
+
+
+@pytest.mark.parametrize(
+    "update",
+    [
+        {},
+        {"value": 0},
+        {"value": "one"},
+        {"count": -3, "ratio": 0.0, "flag": False, "text": "", "color": Color.RED},
+        {"created_at": datetime.datetime(1960, 1, 1, 0, 0, 0, 1)},
+        {"elapsed": datetime.timedelta(microseconds=-1)},
+        {"numbers": [], "labels": {"": 0, "b": -1}},
+    ],
+)
+def test_wire_serializer_matches_pb2(pb2_module, update):
+    request = make_request().model_copy(update=update)
+    proto = convert_python_message_to_proto(request, RichRequest, pb2_module)
+
+    data = get_wire_serializer(RichRequest)(request)
+    assert pb2_module.RichRequest.FromString(data) == proto
+
+
+@pytest.mark.parametrize("trusted", [False, True])
+@pytest.mark.parametrize(
+    "update",
+    [
+        {},
+        {"value": "one"},
+        {"count": -3, "ratio": 0.0, "flag": False, "text": "", "color": Color.RED},
+        {"created_at": datetime.datetime(1960, 1, 1, 0, 0, 0, 1)},
+        {"elapsed": datetime.timedelta(microseconds=-1)},
+        {"numbers": [], "labels": {"": 0, "b": -1}},
+    ],
+)
+def test_wire_deserializer_matches_pb2(pb2_module, update, trusted):
+    request = make_request().model_copy(update=update)
+    data = get_wire_serializer(RichRequest)(request)
+
+    kwargs = get_wire_deserializer(RichRequest, trusted)(data)
+    parsed = RichRequest.model_construct(**kwargs) if trusted else RichRequest(**kwargs)
+    converter = generate_message_converter(RichRequest, pb2_module)
+    assert parsed == converter(pb2_module.RichRequest.FromString(data)) == request
+
+
+def test_wire_deserializer_fills_defaults(pb2_module):
+    unpacked = bytes([0x40, 0x01, 0x40, 0x02])  # numbers = [1, 2], not packed
+    kwargs = get_wire_deserializer(RichRequest, trusted=True)(unpacked)
+    converter = generate_message_converter(RichRequest, pb2_module, trusted=True)
+    proto = pb2_module.RichRequest.FromString(unpacked)
+    assert RichRequest.model_construct(**kwargs) == converter(proto)
+    assert kwargs["numbers"] == [1, 2]
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"\x0a\x10ab",  # text claims 16 bytes
+        b"\x10\xff",  # truncated varint
+        b"\x1d\x00\x00",  # truncated float
+        b"\x42\x03\x01\x02",  # packed numbers claim 3 bytes
+        b"\x9a\x06\x05a",  # unknown field claims 5 bytes
+        b"\x32\x02\x08\x96\x01",  # varint runs past the nested point
+    ],
+)
+def test_wire_deserializer_rejects_truncated_input(pb2_module, data):
+    with pytest.raises(DecodeError):
+        pb2_module.RichRequest.FromString(data)
+    with pytest.raises(DecodeError):
+        get_wire_deserializer(RichRequest)(data)
@@ -0,0 +1,1073 @@
+import asyncio
+import gzip
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections.abc import AsyncIterator, Iterator
+from concurrent import futures
+from types import SimpleNamespace
+from typing import Annotated
+
+import grpc
+import pytest
+from grpc_health.v1 import health_pb2, health_pb2_grpc
+from grpc_health.v1.health import HealthServicer
+from pydantic import Field
+
+from pydantic_rpc import (
+    AdaptiveLimiter,
+    AsyncIOServer,
+    LoadAwareHealth,
+    Message,
+    Server,
+    ServerOptions,
+    batch_requests,
+    coalesce_responses,
+    compress_response,
+    lazy_request,
+    limit_concurrency,
+    prefetch_responses,
+    run_in_process,
+    run_inline,
+)
+from pydantic_rpc.core import (
+    ConcurrencyLimitInterceptor,
+    InFlightInterceptor,
+    WorkerSupervisor,
+    apply_concurrency_limit,
+    apply_response_compression,
+    batch_request_stream,
+    coalesce_response_iter,
+    coalesce_response_stream,
+    compressing_asgi_send,
+    connect_obj_with_stub,
+    connect_obj_with_stub_async,
+    executor_queue_depth,
+    generate_and_compile_proto,
+    generate_proto,
+    merge_string_fields,
+    prefetch_stream,
+    uvloop,
+)
+
+
+class WireRequest(Message):
+    name: str
+    count: int
+
+
+class WireResponse(Message):
+    greeting: str
+    counts: list[int]
+
+
+class WireService:
+    def greet(self, request: WireRequest) -> WireResponse:
+        return WireResponse(
+            greeting=f"Hello, {request.name}!", counts=[request.count] * 3
+        )
+
+
+@pytest.fixture(scope="module")
+def wire_modules(compile_proto):
+    return compile_proto(WireService())
+
+
+def serve(server: Server, pb2_grpc_module, pb2_module, obj) -> int:
+    server.mount_using_pb2_modules(pb2_grpc_module, pb2_module, obj)
+    port = server._server.add_insecure_port("127.0.0.1:0")
+    server._server.start()
+    return port
+
+
+def test_server_options_channel_args():
+    options = ServerOptions.preset("bulk-transfer", http2_bdp_probe=False)
+    args = dict(options.channel_args())
+    assert args["grpc.max_receive_message_length"] == 64 * 1024 * 1024
+    assert args["grpc.http2.bdp_probe"] == 0
+    assert "grpc.keepalive_time_ms" not in args
+
+    assert ServerOptions(extra={"grpc.so_reuseport": 0}).channel_args() == [
+        ("grpc.so_reuseport", 0)
+    ]
+    with pytest.raises(ValueError):
+        ServerOptions.preset("fast")
+
+
+@pytest.mark.parametrize("options", [None, "bulk-transfer"])
+def test_server_message_size_limit(wire_modules, options):
+    pb2_grpc_module, pb2_module = wire_modules
+    server = Server(options=options)
+    port = serve(server, pb2_grpc_module, pb2_module, WireService())
+    limits = [
+        ("grpc.max_receive_message_length", -1),
+        ("grpc.max_send_message_length", -1),
+    ]
+    try:
+        with grpc.insecure_channel(f"127.0.0.1:{port}", limits) as channel:
+            stub = pb2_grpc_module.WireServiceStub(channel)
+            request = pb2_module.WireRequest(name="x" * (5 * 1024 * 1024))
+            if options is None:
+                with pytest.raises(grpc.RpcError) as e:
+                    stub.Greet(request)
+                assert e.value.code() == grpc.StatusCode.RESOURCE_EXHAUSTED
+            else:
+                assert len(stub.Greet(request).greeting) > 5 * 1024 * 1024
+    finally:
+        server._server.stop(None)
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {},
+        {"wire_serialization": True},
+        {"wire_deserialization": True},
+        {"wire_deserialization": True, "validation": "trusted"},
+    ],
+)
+def test_server_round_trip(wire_modules, options):
+    pb2_grpc_module, pb2_module = wire_modules
+    server = Server(**options)
+    port = serve(server, pb2_grpc_module, pb2_module, WireService())
+    try:
+        with grpc.insecure_channel(f"127.0.0.1:{port}") as channel:
+            stub = pb2_grpc_module.WireServiceStub(channel)
+            response = stub.Greet(pb2_module.WireRequest(name="wire", count=2))
+        assert response.greeting == "Hello, wire!"
+        assert list(response.counts) == [2, 2, 2]
+    finally:
+        server._server.stop(None)
+
+
+class PidService:
+    def greet(self, request: WireRequest) -> WireResponse:
+        return WireResponse(greeting=str(os.getpid()), counts=[])
+
+
+WORKERS_SCRIPT = """
+import sys
+from pydantic_rpc import Server
+from test_server import PidService
+
+server = Server(workers=int(sys.argv[2]), max_requests=int(sys.argv[3]) or None)
+server.set_port(int(sys.argv[1]))
+server.run(PidService())
+"""
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.mark.parametrize("workers, max_requests", [(2, 0), (1, 3)])
+def test_server_workers(monkeypatch, workers, max_requests):
+    """Two workers share the port; a recycled single worker changes pid."""
+    monkeypatch.setenv("PYDANTIC_RPC_CODEGEN", "memory")
+    pb2_grpc_module, pb2_module = generate_and_compile_proto(PidService())
+    port = free_port()
+    proc = subprocess.Popen(
+        [
+            sys.executable,
+            "-c",
+            WORKERS_SCRIPT,
+            str(port),
+            str(workers),
+            str(max_requests),
+        ],
+        cwd=os.path.dirname(__file__),
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        pids = set()
+        deadline = time.monotonic() + 20
+        while len(pids) < 2 and time.monotonic() < deadline:
+            with grpc.insecure_channel(f"127.0.0.1:{port}") as channel:
+                stub = pb2_grpc_module.PidServiceStub(channel)
+                try:
+                    response = stub.Greet(pb2_module.WireRequest(), timeout=1)
+                except grpc.RpcError:
+                    time.sleep(0.1)
+                    continue
+                pids.add(int(response.greeting))
+        assert len(pids) == 2
+        assert proc.pid not in pids
+
+        proc.send_signal(signal.SIGTERM)
+        assert proc.wait(timeout=20) == 0
+    finally:
+        proc.kill()
+
+
+@pytest.mark.filterwarnings("ignore:.*fork:DeprecationWarning")
+def test_worker_supervisor_reload_replaces_workers():
+    supervisor = WorkerSupervisor(
+        2, lambda: (supervisor.notify_ready(), signal.pause())
+    )
+    thread = threading.Thread(target=supervisor.run, args=(False,))
+    thread.start()
+    try:
+        time.sleep(0.5)
+        old_pids = set(supervisor._pids)
+        supervisor.reload()
+        deadline = time.monotonic() + 10
+        while supervisor._pids.keys() & old_pids and time.monotonic() < deadline:
+            time.sleep(0.1)
+        assert len(supervisor._pids) == 2
+        assert not supervisor._pids.keys() & old_pids
+    finally:
+        supervisor.stop()
+        thread.join(10)
+    assert not thread.is_alive()
+
+
+class MixedService:
+    async def greet(self, request: WireRequest) -> WireResponse:
+        return WireResponse(greeting=threading.current_thread().name, counts=[])
+
+    def block(self, request: WireRequest) -> WireResponse:
+        return WireResponse(greeting=threading.current_thread().name, counts=[])
+
+    @run_inline
+    def peek(self, request: WireRequest) -> WireResponse:
+        return WireResponse(greeting=threading.current_thread().name, counts=[])
+
+
+def test_async_stub_offloads_sync_methods(compile_proto):
+    pb2_grpc_module, pb2_module = compile_proto(MixedService())
+    executor = futures.ThreadPoolExecutor(1, thread_name_prefix="offload")
+    servicer = connect_obj_with_stub_async(
+        pb2_grpc_module, pb2_module, MixedService(), executor=executor
+    )()
+
+    async def call_all():
+        request = pb2_module.WireRequest()
+        return [
+            (await getattr(servicer, name)(request, None)).greeting
+            for name in ("Greet", "Block", "Peek")
+        ]
+
+    try:
+        assert asyncio.run(call_all()) == ["MainThread", "offload_0", "MainThread"]
+    finally:
+        executor.shutdown()
+
+
+class CpuService:
+    def __init__(self):
+        self.calls = 0
+
+    @run_in_process(max_workers=1)
+    def crunch(self, request: WireRequest) -> WireResponse:
+        self.calls += 1
+        return WireResponse(greeting=str(os.getpid()), counts=[self.calls])
+
+
+@pytest.mark.parametrize(
+    "connect", [connect_obj_with_stub, connect_obj_with_stub_async]
+)
+def test_run_in_process_keeps_warm_state(compile_proto, connect):
+    pb2_grpc_module, pb2_module = compile_proto(CpuService())
+    servicer = connect(pb2_grpc_module, pb2_module, CpuService())()
+    context = SimpleNamespace(add_callback=lambda callback: True)
+
+    async def call_twice():
+        request = pb2_module.WireRequest()
+        return [await servicer.Crunch(request, context) for _ in range(2)]
+
+    if connect is connect_obj_with_stub:
+        responses = [
+            servicer.Crunch(pb2_module.WireRequest(), context) for _ in range(2)
+        ]
+    else:
+        responses = asyncio.run(call_twice())
+
+    assert int(responses[0].greeting) != os.getpid()
+    assert [list(r.counts) for r in responses] == [[1], [2]]
+
+
+class LazyCpuService:
+    @lazy_request()
+    @run_in_process(max_workers=1)
+    def echo(self, request: WireRequest) -> WireResponse:
+        return WireResponse(greeting=request.name, counts=[request.count])
+
+
+def test_run_in_process_with_lazy_request(compile_proto):
+    pb2_grpc_module, pb2_module = compile_proto(LazyCpuService())
+    servicer = connect_obj_with_stub(pb2_grpc_module, pb2_module, LazyCpuService())()
+    context = SimpleNamespace(add_callback=lambda callback: True)
+    response = servicer.Echo(pb2_module.WireRequest(name="lazy", count=2), context)
+    assert (response.greeting, list(response.counts)) == ("lazy", [2])
+
+
+def test_drain_shuts_down_process_pools(compile_proto):
+    pb2_grpc_module, pb2_module = compile_proto(CpuService())
+    server = Server()
+    server.mount_using_pb2_modules(pb2_grpc_module, pb2_module, CpuService())
+    port = free_port()
+    server.set_port(port)
+    server._start()
+    try:
+        with grpc.insecure_channel(f"127.0.0.1:{port}") as channel:
+            stub = pb2_grpc_module.CpuServiceStub(channel)
+            assert list(stub.Crunch(pb2_module.WireRequest()).counts) == [1]
+        [runner] = server._process_runners
+        assert runner._executor is not None
+    finally:
+        server._drain()
+    assert runner._executor is None
+
+
+class SlowService:
+    def __init__(self):
+        self.started = 0
+
+    def wait(self, request: WireRequest) -> WireResponse:
+        self.started += 1
+        time.sleep(request.count / 10)
+        return WireResponse(greeting="done", counts=[])
+
+
+@pytest.fixture(scope="module")
+def slow_modules(compile_proto):
+    return compile_proto(SlowService())
+
+
+def test_server_sheds_load(slow_modules):
+    pb2_grpc_module, pb2_module = slow_modules
+    service = SlowService()
+    server = Server(max_workers=1, max_queue_depth=1)
+    port = serve(server, pb2_grpc_module, pb2_module, service)
+    try:
+        with grpc.insecure_channel(f"127.0.0.1:{port}") as channel:
+            stub = pb2_grpc_module.SlowServiceStub(channel)
+            running = stub.Wait.future(pb2_module.WireRequest(count=5))
+            time.sleep(0.1)
+            expiring = stub.Wait.future(pb2_module.WireRequest(count=0), timeout=0.2)
+            time.sleep(0.1)
+            with pytest.raises(grpc.RpcError) as e:
+                stub.Wait(pb2_module.WireRequest(count=0))
+            assert e.value.code() == grpc.StatusCode.RESOURCE_EXHAUSTED
+
+            assert running.result().greeting == "done"
+            with pytest.raises(grpc.RpcError):
+                expiring.result()
+            time.sleep(0.1)
+        # The queued call expired before a worker thread picked it up.
+        assert service.started == 1
+    finally:
+        server._server.stop(None)
+
+
+def test_adaptive_limiter_follows_latency():
+    limiter = AdaptiveLimiter(initial_limit=2, max_limit=4)
+    assert limiter.try_acquire() and limiter.try_acquire()
+    assert not limiter.try_acquire()
+
+    limiter.release(0.01)
+    limiter.release(0.01)
+    assert limiter.limit == 3
+
+    for _ in range(3):
+        assert limiter.try_acquire()
+        limiter.release(1.0)
+    assert limiter.limit < 3
+    assert limiter.in_flight == 0
+
+
+def test_adaptive_limiter_ignores_failed_calls():
+    limiter = AdaptiveLimiter()
+
+    def stub(self, request, context):
+        if request is None:
+            raise RuntimeError("invalid request")
+        time.sleep(0.01)
+        return request
+
+    limited = apply_concurrency_limit(stub, limiter, None)
+    with pytest.raises(RuntimeError):
+        limited(None, None, None)
+    assert limited(None, 1, None) == 1
+    # A fast failure must not become the baseline that later calls exceed.
+    assert limiter.limit == 20
+    assert limiter.in_flight == 0
+
+    assert limiter.try_acquire()
+    limiter.release(None)
+    assert limiter.limit == 20
+
+
+class Amount(Message):
+    value: Annotated[int, Field(ge=0)]
+
+
+VALIDATED_LIMITER = AdaptiveLimiter()
+
+
+class ValidatedLimitService:
+    @limit_concurrency(VALIDATED_LIMITER)
+    def check(self, request: Amount) -> Amount:
+        time.sleep(0.01)
+        return request
+
+
+def test_concurrency_limit_ignores_rejected_requests(compile_proto):
+    pb2_grpc_module, pb2_module = compile_proto(ValidatedLimitService())
+    server = Server()
+    port = serve(server, pb2_grpc_module, pb2_module, ValidatedLimitService())
+    try:
+        with grpc.insecure_channel(f"127.0.0.1:{port}") as channel:
+            stub = pb2_grpc_module.ValidatedLimitServiceStub(channel)
+            with pytest.raises(grpc.RpcError) as e:
+                stub.Check(pb2_module.Amount(value=-1))
+            assert e.value.code() == grpc.StatusCode.INVALID_ARGUMENT
+            for _ in range(3):
+                assert stub.Check(pb2_module.Amount(value=1)).value == 1
+    finally:
+        server._server.stop(None)
+    assert VALIDATED_LIMITER.limit == 20
+    assert VALIDATED_LIMITER.in_flight == 0
+
+
+class LimitedService:
+    @limit_concurrency(AdaptiveLimiter(initial_limit=1, max_limit=1))
+    def wait(self, request: WireRequest) -> WireResponse:
+        time.sleep(request.count / 10)
+        return WireResponse(greeting="done", counts=[])
+
+
+@pytest.fixture(scope="module")
+def limited_modules(compile_proto):
+    return compile_proto(LimitedService())
+
+
+def test_concurrency_limit_rejects_excess_calls(limited_modules):
+    pb2_grpc_module, pb2_module = limited_modules
+    server = Server(max_workers=4)
+    port = serve(server, pb2_grpc_module, pb2_module, LimitedService())
+    try:
+        with grpc.insecure_channel(f"127.0.0.1:{port}") as channel:
+            stub = pb2_grpc_module.LimitedServiceStub(channel)
+            running = stub.Wait.future(pb2_module.WireRequest(count=5))
+            time.sleep(0.1)
+            with pytest.raises(grpc.RpcError) as e:
+                stub.Wait(pb2_module.WireRequest(count=0))
+            assert e.value.code() == grpc.StatusCode.RESOURCE_EXHAUSTED
+            assert running.result().greeting == "done"
+            assert stub.Wait(pb2_module.WireRequest(count=0)).greeting == "done"
+    finally:
+        server._server.stop(None)
+
+
+QUEUE_LIMITER = AdaptiveLimiter(initial_limit=2, max_limit=2)
+
+
+class QueuedLimitService:
+    @limit_concurrency(QUEUE_LIMITER)
+    def wait(self, request: WireRequest) -> WireResponse:
+        time.sleep(request.count / 10)
+        return WireResponse(greeting="done", counts=[])
+
+
+def test_concurrency_limit_counts_queued_calls(compile_proto):
+    pb2_grpc_module, pb2_module = compile_proto(QueuedLimitService())
+    # The factory makes Server admit calls as they arrive; the method keeps
+    # its own limiter.
+    server = Server(max_workers=1, concurrency_limiter=AdaptiveLimiter)
+    port = serve(server, pb2_grpc_module, pb2_module, QueuedLimitService())
+    try:
+        with grpc.insecure_channel(f"127.0.0.1:{port}") as channel:
+            stub = pb2_grpc_module.QueuedLimitServiceStub(channel)
+            running = stub.Wait.future(pb2_module.WireRequest(count=5))
+            time.sleep(0.1)
+            queued = stub.Wait.future(pb2_module.WireRequest(count=0))
+            time.sleep(0.1)
+            # One call runs and one waits for the only thread: the limit is hit.
+            with pytest.raises(grpc.RpcError) as e:
+                stub.Wait(pb2_module.WireRequest(count=0))
+            assert e.value.code() == grpc.StatusCode.RESOURCE_EXHAUSTED
+
+            queued.cancel()
+            assert running.result().greeting == "done"
+            time.sleep(0.1)
+            # The cancelled call never ran, but its slot was returned.
+            assert QUEUE_LIMITER.in_flight == 0
+    finally:
+        server._server.stop(None)
+
+
+class CompressionContext:
+    def __init__(self):
+        self.compression = None
+        self.skipped = 0
+
+    def set_compression(self, compression):
+        self.compression = compression
+
+    def disable_next_message_compression(self):
+        self.skipped += 1
+
+
+def test_response_compression_threshold():
+    @compress_response("gzip", min_size=4)
+    def method(request):
+        return request
+
+    def stub(self, request, context):
+        return request
+
+    compressed = apply_response_compression(stub, method)
+    context = CompressionContext()
+    assert compressed(None, b"large", context) == b"large"
+    assert context.compression == grpc.Compression.Gzip
+    compressed(None, b"abc", context)
+    assert context.compression == grpc.Compression.NoCompression
+
+    async def stream_stub(self, request, context):
+        for item in request:
+            yield item
+
+    async def collect():
+        stream = apply_response_compression(stream_stub, method)
+        return [r async for r in stream(None, [b"ab", b"abcd", b"a"], context)]
+
+    assert asyncio.run(collect()) == [b"ab", b"abcd", b"a"]
+    assert context.compression == grpc.Compression.Gzip
+    assert context.skipped == 2
+
+
+@pytest.mark.parametrize(
+    "accept, body, compressed",
+    [("gzip, br", b"x" * 100, True), ("br", b"x" * 100, False), ("gzip", b"x", False)],
+)
+def test_connecpy_asgi_compression(accept, body, compressed):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def respond():
+        policy = {"algorithm": "gzip", "min_size": 10}
+        send_compressed = compressing_asgi_send(send, policy, accept)
+        start = {"type": "http.response.start", "status": 200, "headers": []}
+        await send_compressed(start)
+        await send_compressed({"type": "http.response.body", "body": body})
+
+    asyncio.run(respond())
+    start, message = sent
+    assert ((b"content-encoding", b"gzip") in start["headers"]) == compressed
+    assert (gzip.decompress(message["body"]) if compressed else message["body"]) == body
+
+
+# In-flight RPCs, and so those cut off, are only counted with load_health.
+@pytest.mark.parametrize("load_health, cut", [(LoadAwareHealth(), 1), (None, None)])
+def test_server_drains_before_shutdown(slow_modules, load_health, cut):
+    pb2_grpc_module, pb2_module = slow_modules
+    server = Server(drain_delay=0.3, shutdown_grace=0.5, load_health=load_health)
+    server.mount_using_pb2_modules(pb2_grpc_module, pb2_module, SlowService())
+    port = free_port()
+    server.set_port(port)
+    server._start()
+    with grpc.insecure_channel(f"127.0.0.1:{port}") as channel:
+        health = health_pb2_grpc.HealthStub(channel)
+        service = pb2_module.DESCRIPTOR.services_by_name["SlowService"]
+        check = health_pb2.HealthCheckRequest(service=service.full_name)
+        assert health.Check(check).status == health_pb2.HealthCheckResponse.SERVING
+
+        stub = pb2_grpc_module.SlowServiceStub(channel)
+        finishing = stub.Wait.future(pb2_module.WireRequest(count=4))
+        cut_off = stub.Wait.future(pb2_module.WireRequest(count=20))
+        time.sleep(0.1)
+        drained = futures.ThreadPoolExecutor(1).submit(server._drain)
+        time.sleep(0.1)
+        status = health.Check(check).status
+        assert status == health_pb2.HealthCheckResponse.NOT_SERVING
+        # Still serving during the drain delay.
+        assert stub.Wait(pb2_module.WireRequest(count=0)).greeting == "done"
+
+        assert drained.result() == cut
+        assert finishing.result().greeting == "done"
+        with pytest.raises(grpc.RpcError):
+            cut_off.result()
+
+
+def test_load_aware_health_hysteresis():
+    servicer = HealthServicer()
+    health = LoadAwareHealth(max_in_flight=10, max_loop_lag=0.1, recovery=0.5)
+    health.attach(servicer, [""])
+    request = health_pb2.HealthCheckRequest(service="")
+
+    def status():
+        return servicer.Check(request, None).status
+
+    servicer.set("", health_pb2.HealthCheckResponse.SERVING)
+    assert not health.update(in_flight=10, loop_lag=0.05)
+    assert health.update(in_flight=3, loop_lag=0.2)
+    assert status() == health_pb2.HealthCheckResponse.NOT_SERVING
+    assert health.update(in_flight=8)
+    assert not health.update(in_flight=5, loop_lag=0.05)
+    assert status() == health_pb2.HealthCheckResponse.SERVING
+
+
+def test_server_installs_interceptors_only_when_used():
+    assert Server()._interceptors == ()
+    server = Server(concurrency_limiter=AdaptiveLimiter, load_health=LoadAwareHealth())
+    assert [type(i) for i in server._interceptors] == [
+        InFlightInterceptor,
+        ConcurrencyLimitInterceptor,
+    ]
+    assert AsyncIOServer()._interceptors == ()
+
+
+def test_drain_before_start():
+    assert Server()._drain() == 0
+    assert asyncio.run(AsyncIOServer()._drain()) == 0
+
+
+def test_server_reports_saturation(slow_modules):
+    pb2_grpc_module, pb2_module = slow_modules
+    load_health = LoadAwareHealth(max_in_flight=1, interval=0.05)
+    server = Server(max_workers=4, load_health=load_health)
+    server.mount_using_pb2_modules(pb2_grpc_module, pb2_module, SlowService())
+    port = free_port()
+    server.set_port(port)
+    server._start()
+    try:
+        with grpc.insecure_channel(f"127.0.0.1:{port}") as channel:
+            health = health_pb2_grpc.HealthStub(channel)
+            check = health_pb2.HealthCheckRequest(service="")
+            stub = pb2_grpc_module.SlowServiceStub(channel)
+            calls = [
+                stub.Wait.future(pb2_module.WireRequest(count=4)) for _ in range(2)
+            ]
+            time.sleep(0.2)
+            status = health.Check(check).status
+            assert status == health_pb2.HealthCheckResponse.NOT_SERVING
+            for call in calls:
+                call.result()
+            time.sleep(0.2)
+            assert health.Check(check).status == health_pb2.HealthCheckResponse.SERVING
+    finally:
+        server._drain()
+
+
+def test_async_server_samples_default_executor_queue(slow_modules):
+    pb2_grpc_module, pb2_module = slow_modules
+    load_health = LoadAwareHealth(max_queue_depth=1, interval=0.05)
+
+    async def main():
+        server = AsyncIOServer(load_health=load_health)
+        server.mount_using_pb2_modules(pb2_grpc_module, pb2_module, SlowService())
+        port = free_port()
+        server.set_port(port)
+        await server._start()
+        try:
+            async with grpc.aio.insecure_channel(f"127.0.0.1:{port}") as channel:
+                health = health_pb2_grpc.HealthStub(channel)
+                check = health_pb2.HealthCheckRequest(service="")
+                stub = pb2_grpc_module.SlowServiceStub(channel)
+                # More sync calls than the default executor has threads.
+                calls = [
+                    asyncio.ensure_future(stub.Wait(pb2_module.WireRequest(count=3)))
+                    for _ in range(40)
+                ]
+                await asyncio.sleep(0.2)
+                saturated = (await health.Check(check)).status
+                await asyncio.gather(*calls)
+                await asyncio.sleep(0.2)
+                recovered = (await health.Check(check)).status
+        finally:
+            await server._drain()
+        return saturated, recovered
+
+    assert asyncio.run(main()) == (
+        health_pb2.HealthCheckResponse.NOT_SERVING,
+        health_pb2.HealthCheckResponse.SERVING,
+    )
+
+
+class ServeService(MixedService):
+    pass
+
+
+SERVE_SCRIPT = """
+import sys
+from pydantic_rpc import AsyncIOServer
+from test_server import ServeService
+
+server = AsyncIOServer()
+server.set_port(int(sys.argv[1]))
+server.serve(ServeService(), default_executor_workers=2, slow_callback_duration=1)
+"""
+
+
+def test_async_server_serve(monkeypatch):
+    monkeypatch.setenv("PYDANTIC_RPC_CODEGEN", "memory")
+    pb2_grpc_module, pb2_module = generate_and_compile_proto(ServeService())
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-c", SERVE_SCRIPT, str(port)],
+        cwd=os.path.dirname(__file__),
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        with grpc.insecure_channel(f"127.0.0.1:{port}") as channel:
+            grpc.channel_ready_future(channel).result(timeout=20)
+            stub = pb2_grpc_module.ServeServiceStub(channel)
+            response = stub.Block(pb2_module.WireRequest(), timeout=5)
+            assert response.greeting.startswith("ThreadPoolExecutor")
+
+        proc.send_signal(signal.SIGTERM)
+        assert proc.wait(timeout=20) == 0
+    finally:
+        proc.kill()
+
+
+@pytest.mark.skipif(uvloop is not None, reason="uvloop is installed")
+def test_async_server_serve_requires_uvloop():
+    with pytest.raises(ImportError):
+        AsyncIOServer().serve(use_uvloop=True)
+
+
+class Record(Message):
+    amount: Annotated[int, Field(ge=0)]
+
+
+class Total(Message):
+    total: int
+    count: int
+
+
+class IngestService:
+    async def ingest(self, records: AsyncIterator[Record]) -> Total:
+        amounts = [record.amount async for record in records]
+        return Total(total=sum(amounts), count=len(amounts))
+
+    async def running_total(
+        self, records: AsyncIterator[Record], context
+    ) -> AsyncIterator[Total]:
+        total = count = 0
+        async for record in records:
+            total, count = total + record.amount, count + 1
+            yield Total(total=total, count=count)
+
+    @batch_requests(max_count=2)
+    async def ingest_batches(self, batches: AsyncIterator[list[Record]]) -> Total:
+        sizes = [len(batch) async for batch in batches]
+        return Total(total=sum(sizes), count=len(sizes))
+
+
+class InMemoryIngestService(IngestService):
+    pass
+
+
+@pytest.mark.parametrize(
+    "service_class, options",
+    [
+        (IngestService, {}),
+        (IngestService, {"wire_deserialization": True}),
+        (InMemoryIngestService, {}),
+    ],
+)
+def test_request_streams(compile_proto, monkeypatch, service_class, options):
+    if service_class is InMemoryIngestService:
+        monkeypatch.setenv("PYDANTIC_RPC_CODEGEN", "memory")
+    pb2_grpc_module, pb2_module = compile_proto(service_class())
+    name = service_class.__name__
+    assert "rpc Ingest (stream Record) returns (Total);" in generate_proto(
+        service_class()
+    )
+
+    async def records(*amounts):
+        for amount in amounts:
+            yield pb2_module.Record(amount=amount)
+
+    async def main():
+        server = AsyncIOServer(**options)
+        server.mount_using_pb2_modules(pb2_grpc_module, pb2_module, service_class())
+        port = server._server.add_insecure_port("127.0.0.1:0")
+        await server._server.start()
+        try:
+            async with grpc.aio.insecure_channel(f"127.0.0.1:{port}") as channel:
+                stub = getattr(pb2_grpc_module, f"{name}Stub")(channel)
+                total = await stub.Ingest(records(1, 2, 3))
+                assert (total.total, total.count) == (6, 3)
+
+                call = stub.RunningTotal(records(4, 5))
+                assert [t.total async for t in call] == [4, 9]
+
+                total = await stub.IngestBatches(records(1, 2, 3, 4, 5))
+                assert (total.total, total.count) == (5, 3)
+
+                with pytest.raises(grpc.aio.AioRpcError) as e:
+                    await stub.Ingest(records(1, -1))
+                assert e.value.code() == grpc.StatusCode.INVALID_ARGUMENT
+        finally:
+            await server._server.stop(None)
+
+    asyncio.run(main())
+
+
+def test_executor_queue_depth():
+    executor = futures.ThreadPoolExecutor(1)
+    started = threading.Event()
+    release = threading.Event()
+
+    def block():
+        started.set()
+        release.wait()
+
+    try:
+        executor.submit(block)
+        started.wait()
+        executor.submit(block)
+        assert executor_queue_depth(executor) == 1
+    finally:
+        release.set()
+        executor.shutdown()
+    assert executor_queue_depth(None) == 0
+    assert executor_queue_depth(futures.Executor()) == 0
+
+
+def test_batch_requests_checks_limits():
+    assert batch_requests(max_wait=0)
+    with pytest.raises(ValueError, match="max_wait not negative"):
+        batch_requests(max_wait=-1)
+    with pytest.raises(ValueError):
+        batch_requests(max_count=0)
+
+
+def test_batch_request_stream_limits():
+    async def arrivals():
+        for delay, size in [(0, 1), (0, 1), (0, 1), (0, 5), (0, 1), (0, 1), (0.2, 1)]:
+            await asyncio.sleep(delay)
+            yield size
+
+    async def collect():
+        batches = batch_request_stream(
+            arrivals(),
+            lambda size: (size, size),
+            max_count=3,
+            max_bytes=6,
+            max_wait=0.05,
+        )
+        return [batch async for batch in batches]
+
+    # Full at 3 requests, then at 6 bytes; then one request waits max_wait.
+    assert asyncio.run(collect()) == [[1, 1, 1], [5, 1], [1], [1]]
+
+
+class CountService:
+    def __init__(self):
+        self.produced = 0
+
+    def count(self, request: WireRequest) -> Iterator[WireResponse]:
+        for i in range(request.count):
+            self.produced += 1
+            yield WireResponse(greeting=request.name, counts=[i])
+
+
+@pytest.fixture(scope="module")
+def count_modules(compile_proto):
+    return compile_proto(CountService())
+
+
+def test_sync_server_streaming(count_modules):
+    pb2_grpc_module, pb2_module = count_modules
+    service = CountService()
+    server = Server()
+    port = serve(server, pb2_grpc_module, pb2_module, service)
+    try:
+        # A fixed receive window, so the client does not keep growing it.
+        options = [("grpc.http2.bdp_probe", 0)]
+        with grpc.insecure_channel(f"127.0.0.1:{port}", options) as channel:
+            stub = pb2_grpc_module.CountServiceStub(channel)
+            responses = stub.Count(pb2_module.WireRequest(name="n", count=3))
+            assert [list(r.counts) for r in responses] == [[0], [1], [2]]
+
+            # The generator stalls once a client that stops reading has
+            # filled its window.
+            responses = stub.Count(pb2_module.WireRequest(name="n", count=10**6))
+            next(responses)
+            time.sleep(0.3)
+            produced = service.produced
+            time.sleep(0.3)
+            assert service.produced == produced < 10**6
+            responses.cancel()
+    finally:
+        server._server.stop(None)
+
+
+def test_async_server_streams_sync_generators(count_modules):
+    pb2_grpc_module, pb2_module = count_modules
+
+    async def main():
+        server = AsyncIOServer()
+        server.mount_using_pb2_modules(pb2_grpc_module, pb2_module, CountService())
+        port = server._server.add_insecure_port("127.0.0.1:0")
+        await server._server.start()
+        try:
+            async with grpc.aio.insecure_channel(f"127.0.0.1:{port}") as channel:
+                stub = pb2_grpc_module.CountServiceStub(channel)
+                call = stub.Count(pb2_module.WireRequest(name="n", count=3))
+                return [list(r.counts) async for r in call]
+        finally:
+            await server._server.stop(None)
+
+    assert asyncio.run(main()) == [[0], [1], [2]]
+
+
+class Token(Message):
+    text: str
+    final: bool = False
+
+
+class TokenService:
+    @coalesce_responses(max_wait=10, max_bytes=4)
+    def spell(self, request: WireRequest) -> Iterator[Token]:
+        for char in request.name:
+            yield Token(text=char)
+        yield Token(text="", final=True)
+
+
+def test_coalesced_server_stream(compile_proto):
+    pb2_grpc_module, pb2_module = compile_proto(TokenService())
+    request = pb2_module.WireRequest(name="abcdefghij")
+    server = Server()
+    port = serve(server, pb2_grpc_module, pb2_module, TokenService())
+    try:
+        with grpc.insecure_channel(f"127.0.0.1:{port}") as channel:
+            stub = pb2_grpc_module.TokenServiceStub(channel)
+            tokens = [(r.text, r.final) for r in stub.Spell(request)]
+    finally:
+        server._server.stop(None)
+
+    async def main():
+        server = AsyncIOServer()
+        server.mount_using_pb2_modules(pb2_grpc_module, pb2_module, TokenService())
+        port = server._server.add_insecure_port("127.0.0.1:0")
+        await server._server.start()
+        try:
+            async with grpc.aio.insecure_channel(f"127.0.0.1:{port}") as channel:
+                stub = pb2_grpc_module.TokenServiceStub(channel)
+                return [(r.text, r.final) async for r in stub.Spell(request)]
+        finally:
+            await server._server.stop(None)
+
+    # Flushed at 4 bytes; the final token can't be merged into the text.
+    expected = [("abcd", False), ("efgh", False), ("ij", False), ("", True)]
+    assert tokens == expected
+    assert asyncio.run(main()) == expected
+
+
+class Tick(Message):
+    n: int
+
+
+def test_default_reducer_keeps_messages_without_strings():
+    ticks = [Tick(n=1)] * 3
+    merged = coalesce_response_iter(
+        iter(ticks), merge_string_fields, max_bytes=100, max_wait=10
+    )
+    assert list(merged) == ticks
+
+
+def test_coalesce_response_iter_flushes_while_paused():
+    resumed = threading.Event()
+
+    def tokens():
+        yield Token(text="a")
+        yield Token(text="b")
+        time.sleep(0.3)
+        resumed.set()
+        yield Token(text="c")
+
+    merged = coalesce_response_iter(
+        tokens(), merge_string_fields, max_bytes=100, max_wait=0.05
+    )
+    assert next(merged).text == "ab"
+    assert not resumed.is_set()
+    assert [token.text for token in merged] == ["c"]
+
+
+def test_coalesce_response_stream_flushes_after_max_wait():
+    async def tokens():
+        for delay, text in [(0, "a"), (0, "b"), (0.2, "c"), (0, "d")]:
+            await asyncio.sleep(delay)
+            yield Token(text=text)
+
+    async def collect():
+        merged = coalesce_response_stream(
+            tokens(),
+            reducer=lambda a, b: Token(text=a.text + b.text),
+            max_bytes=100,
+            max_wait=0.05,
+        )
+        return [token.text async for token in merged]
+
+    assert asyncio.run(collect()) == ["ab", "cd"]
+
+
+def test_prefetch_stream_bounds_and_closes_producer():
+    produced = []
+    closed = asyncio.Event()
+
+    async def rows():
+        try:
+            for i in range(100):
+                produced.append(i)
+                yield i
+        finally:
+            closed.set()
+
+    async def main():
+        stream = prefetch_stream(rows(), depth=2)
+        assert await anext(stream) == 0
+        await asyncio.sleep(0.05)
+        # Two rows queued and one more waiting for room.
+        assert len(produced) == 4
+        await stream.aclose()
+        await asyncio.wait_for(closed.wait(), 1)
+
+    asyncio.run(main())
+
+
+class PrefetchService:
+    @prefetch_responses(depth=4)
+    async def count(self, request: WireRequest) -> AsyncIterator[WireResponse]:
+        for i in range(request.count):
+            await asyncio.sleep(0)
+            yield WireResponse(greeting=request.name, counts=[i])
+        if request.name == "fail":
+            raise RuntimeError("boom")
+
+
+def test_prefetched_server_stream(compile_proto):
+    pb2_grpc_module, pb2_module = compile_proto(PrefetchService())
+
+    async def main():
+        server = AsyncIOServer()
+        server.mount_using_pb2_modules(pb2_grpc_module, pb2_module, PrefetchService())
+        port = server._server.add_insecure_port("127.0.0.1:0")
+        await server._server.start()
+        try:
+            async with grpc.aio.insecure_channel(f"127.0.0.1:{port}") as channel:
+                stub = pb2_grpc_module.PrefetchServiceStub(channel)
+                call = stub.Count(pb2_module.WireRequest(name="n", count=20))
+                assert [r.counts[0] async for r in call] == list(range(20))
+
+                call = stub.Count(pb2_module.WireRequest(name="fail", count=2))
+                with pytest.raises(grpc.aio.AioRpcError) as e:
+                    [r async for r in call]
+                assert e.value.code() == grpc.StatusCode.INTERNAL
+        finally:
+            await server._server.stop(None)
+
+    asyncio.run(main())